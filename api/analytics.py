@@ -0,0 +1,276 @@
+"""
+Login analytics for Prasadam Connect.
+
+Streams `loginHistory` and `users` (or an exported snapshot) into columnar
+NumPy arrays and computes daily active users, logins per hour and new
+registrations per day with vectorized group-bys (bincount/unique over
+integer day/hour buckets).
+
+Live data is read incrementally: each refresh only queries records from a
+short overlap window before the newest timestamp already processed, so the
+collections are scanned in full once per process.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_HOUR = 3600
+
+
+def to_datetime(value):
+    """
+    Convert a Firestore timestamp, epoch seconds or ISO-8601 string into an
+    aware UTC datetime. Returns None for missing or unparseable values.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    if isinstance(value, str):
+        try:
+            return to_datetime(datetime.fromisoformat(value.replace('Z', '+00:00')))
+        except ValueError:
+            return None
+    return None
+
+
+class EventColumn:
+    """
+    Append-only column of event timestamps (int64 epoch seconds) and user
+    codes (int32), with the cursor of the newest event ingested.
+
+    Server timestamps are not committed in order, so a record can become
+    visible after newer ones were already read. Incremental reads therefore
+    query from `since` (the cursor minus `overlap_seconds`), and the IDs of
+    events inside that window are remembered so re-read events are skipped.
+    Records that show up later than the overlap window are missed.
+
+    Args:
+        overlap_seconds: How far behind the cursor to re-read
+    """
+
+    def __init__(self, overlap_seconds=0):
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.users = np.empty(0, dtype=np.int32)
+        self.cursor = None
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self._recent = {}   # event_id -> moment, for events at or after `since`
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def since(self):
+        """Lower bound for the next incremental read (None before the first read)"""
+        return self.cursor - self.overlap if self.cursor is not None else None
+
+    def ingest(self, rows):
+        """
+        Append events.
+
+        Args:
+            rows: Iterable of (event_id, datetime, user_code)
+
+        Returns:
+            int: Number of new events appended
+        """
+        timestamps = []
+        users = []
+        since = self.since
+        cursor = self.cursor
+        recent = self._recent
+
+        for event_id, moment, user_code in rows:
+            if moment is None or event_id in recent:
+                continue
+            if since is not None and moment < since:
+                continue
+            timestamps.append(int(moment.timestamp()))
+            users.append(user_code)
+            if cursor is None or moment > cursor:
+                cursor = moment
+            # The cursor only grows, so older events can never be re-read
+            if moment >= cursor - self.overlap:
+                recent[event_id] = moment
+
+        if timestamps:
+            self.timestamps = np.concatenate([self.timestamps, np.asarray(timestamps, dtype=np.int64)])
+            self.users = np.concatenate([self.users, np.asarray(users, dtype=np.int32)])
+        if cursor is not None and cursor != self.cursor:
+            self.cursor = cursor
+            since = self.since
+            self._recent = {event_id: moment for event_id, moment in recent.items() if moment >= since}
+        return len(timestamps)
+
+
+class LoginAnalytics:
+    """
+    In-memory login/registration analytics with cached reports.
+
+    Args:
+        layout: LoginHistoryLayout used to stream login records
+        utc_offset_minutes: Offset applied before bucketing into days/hours
+            (e.g. 330 for IST), so reports follow the local calendar
+        overlap_seconds: How far behind the newest processed timestamp each
+            refresh re-reads, to pick up records committed late
+    """
+
+    def __init__(self, layout=None, utc_offset_minutes=0, overlap_seconds=60):
+        self.layout = layout
+        self.offset = int(utc_offset_minutes) * 60
+        self.logins = EventColumn(overlap_seconds)
+        self.registrations = EventColumn(overlap_seconds)
+        self._uid_codes = {}
+        self._reports = {}
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _uid_code(self, uid):
+        code = self._uid_codes.get(uid)
+        if code is None:
+            code = len(self._uid_codes)
+            self._uid_codes[uid] = code
+        return code
+
+    def _ingest(self, login_rows, user_rows):
+        added = self.logins.ingest(
+            (event_id, moment, self._uid_code(uid)) for event_id, moment, uid in login_rows
+        )
+        added += self.registrations.ingest(
+            (uid, moment, self._uid_code(uid)) for uid, moment in user_rows
+        )
+        if added:
+            self._reports = {}
+        return added
+
+    def refresh(self, db):
+        """
+        Read login records and users added since the last refresh.
+
+        Returns:
+            int: Number of new events ingested
+        """
+        with self._lock:
+            login_rows = (
+                (doc.id, to_datetime(doc.get('timestamp')), doc.get('uid'))
+                for doc in self.layout.iter_since(db, self.logins.since, fields=['uid', 'timestamp'])
+            )
+
+            users_query = db.collection('users')
+            if self.registrations.since is not None:
+                users_query = users_query.where('createdAt', '>=', self.registrations.since)
+            users_query = users_query.order_by('createdAt').select(['createdAt'])
+            user_rows = ((doc.id, to_datetime(doc.get('createdAt'))) for doc in users_query.stream())
+
+            added = self._ingest(login_rows, user_rows)
+            self._refreshed_at = time.time()
+            return added
+
+    def refresh_if_stale(self, db, max_age_seconds):
+        """Refresh when the last refresh is older than `max_age_seconds`"""
+        if self._refreshed_at is None or time.time() - self._refreshed_at >= max_age_seconds:
+            return self.refresh(db)
+        return 0
+
+    def load_snapshot(self, logins_path, users_path=None):
+        """
+        Load an exported snapshot (JSON Lines, one document per line).
+
+        Login lines need `uid` and `timestamp` (and optionally `id`); user lines
+        need `uid` and `createdAt`. Timestamps may be epoch seconds or ISO-8601.
+
+        Returns:
+            int: Number of events ingested
+        """
+        def read_lines(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f):
+                    line = line.strip()
+                    if line:
+                        yield line_number, json.loads(line)
+
+        login_rows = (
+            (record.get('id', line_number), to_datetime(record.get('timestamp')), record.get('uid'))
+            for line_number, record in read_lines(logins_path)
+        )
+        user_rows = (
+            (record.get('uid'), to_datetime(record.get('createdAt')))
+            for _, record in (read_lines(users_path) if users_path else ())
+        )
+        with self._lock:
+            added = self._ingest(login_rows, user_rows)
+            self._refreshed_at = time.time()
+            return added
+
+    def report(self, days=30, now=None):
+        """
+        Compute (or return the cached) report for the last `days` days.
+
+        Returns:
+            dict: dailyActiveUsers, loginsPerHour, loginsByHourOfDay,
+                registrationsPerDay and totals
+        """
+        with self._lock:
+            key = (days, int((now or time.time()) + self.offset) // SECONDS_PER_DAY)
+            cached = self._reports.get(key)
+            if cached is not None:
+                return cached
+            report = self._compute(days, now)
+            self._reports[key] = report
+            return report
+
+    def _compute(self, days, now=None):
+        end_day = int((now or time.time()) + self.offset) // SECONDS_PER_DAY
+        start_day = end_day - days + 1
+        day_labels = np.arange(start_day, end_day + 1).astype('datetime64[D]').astype(str).tolist()
+
+        # Logins bucketed by local day/hour, restricted to the window
+        login_seconds = self.logins.timestamps + self.offset
+        login_days = login_seconds // SECONDS_PER_DAY
+        in_window = (login_days >= start_day) & (login_days <= end_day)
+        window_days = login_days[in_window] - start_day
+        window_hours = login_seconds[in_window] // SECONDS_PER_HOUR - start_day * 24
+        window_users = self.logins.users[in_window].astype(np.int64)
+
+        # Daily active users: distinct (day, user) pairs, counted per day
+        user_count = max(len(self._uid_codes), 1)
+        day_user_pairs = np.unique(window_days * user_count + window_users)
+        daily_active = np.bincount(day_user_pairs // user_count, minlength=days)
+
+        logins_per_hour = np.bincount(window_hours, minlength=days * 24)
+        logins_by_hour_of_day = np.bincount(window_hours % 24, minlength=24)
+        hour_labels = np.arange(start_day * 24, (end_day + 1) * 24).astype('datetime64[h]').astype(str).tolist()
+
+        # Registrations per day
+        registration_days = (self.registrations.timestamps + self.offset) // SECONDS_PER_DAY
+        in_window = (registration_days >= start_day) & (registration_days <= end_day)
+        registrations = np.bincount(registration_days[in_window] - start_day, minlength=days)
+
+        return {
+            'days': days,
+            'utcOffsetMinutes': self.offset // 60,
+            'dailyActiveUsers': [
+                {'date': label, 'count': int(count)} for label, count in zip(day_labels, daily_active)
+            ],
+            'loginsPerHour': [
+                {'hour': f'{label}:00', 'count': int(count)} for label, count in zip(hour_labels, logins_per_hour)
+            ],
+            'loginsByHourOfDay': [int(count) for count in logins_by_hour_of_day],
+            'registrationsPerDay': [
+                {'date': label, 'count': int(count)} for label, count in zip(day_labels, registrations)
+            ],
+            'totals': {
+                'logins': len(self.logins),
+                'loginsInWindow': len(window_days),
+                'registrations': len(self.registrations),
+                'registrationsInWindow': int(registrations.sum()),
+            },
+            'lastLoginTimestamp': self.logins.cursor.timestamp() if self.logins.cursor else None,
+            'refreshedAt': self._refreshed_at,
+        }
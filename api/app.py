@@ -3,15 +3,38 @@ Flask API for Prasadam Connect
 Handles user registration and login history
 """
 import os
-from flask import Flask, request, jsonify
+import hmac
+from functools import wraps
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
-import firebase_admin
-from firebase_admin import credentials, firestore
-import re
-import ipaddress
-import traceback
+from firebase_admin import firestore
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from login_history import get_layout
+from client_ip import TrustedProxyIndex, parse_ip, resolve_client_ip
+from geoip import load_table
+import user_agent as user_agent_parser
+from analytics import LoginAnalytics
+from login_events import LoginEventBroker, login_event
+from profiling import RequestProfiler, phase
+import schemas
+from structured_logging import configure_logging, init_request_ids
+from firestore_client import LazyClient, warm_up, warm_up_enabled
+from user_search import UserSearchIndex
+
+# Structured JSON logs written by a background thread from a bounded queue;
+# repeated identical errors are sampled (see structured_logging.py)
+log_handler, log_sampler = configure_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    queue_size=int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+    burst=int(os.getenv('LOG_SAMPLE_BURST', 5)),
+    window=float(os.getenv('LOG_SAMPLE_WINDOW_SECONDS', 60)),
+)
+logger = logging.getLogger('prasadam.api')
 
 app = Flask(__name__)
+init_request_ids(app)
 
 # Configure CORS based on environment
 # In production: restrict to trusted origins from environment variable
@@ -28,7 +51,7 @@ if is_production:
         # If TRUSTED_ORIGINS is not set in production, default to empty list (no CORS)
         # This is a security safeguard - production should always specify trusted origins
         trusted_origins = []
-        print("WARNING: TRUSTED_ORIGINS not set in production. CORS will be disabled.")
+        logger.warning("TRUSTED_ORIGINS not set in production. CORS will be disabled.")
     
     # Configure CORS with trusted origins for production
     CORS(app, 
@@ -40,36 +63,105 @@ else:
     # Development/Testing: permissive CORS settings
     CORS(app)  # Enable CORS for all routes
 
-# Initialize Firebase Admin SDK
-if not firebase_admin._apps:
-    # Try to load from environment variable or service account file
-    cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-    if cred_path and os.path.exists(cred_path):
-        cred = credentials.Certificate(cred_path)
-    else:
-        # Try to load from serviceAccountKey.json in the api directory
-        service_account_path = os.path.join(os.path.dirname(__file__), 'serviceAccountKey.json')
-        if os.path.exists(service_account_path):
-            cred = credentials.Certificate(service_account_path)
-        else:
-            # Use default credentials (for local development with gcloud auth)
-            cred = credentials.ApplicationDefault()
-    
-    firebase_admin.initialize_app(cred)
+# Firestore client, created on first use in each process (see firestore_client.py)
+# so worker boot stays fast and `gunicorn --preload` does not share gRPC channels
+db = LazyClient()
+
+# Login history storage layout (flat, per_user or sharded), see login_history.py
+login_history_layout = get_layout()
+
+# Proxies allowed to set X-Forwarded-For (comma-separated addresses/CIDR networks)
+trusted_proxies = TrustedProxyIndex.from_string(os.getenv('TRUSTED_PROXIES', ''))
+
+# Optional offline geolocation table (see compile_geoip.py), memory-mapped and
+# shared by all workers through the page cache
+geoip_table = load_table(os.getenv('GEOIP_DATABASE'))
 
-db = firestore.client()
+# How user agents are stored on login records: parsed (families only, the
+# smallest documents), both (header + parsed families, while readers of the raw
+# header migrate) or raw (header only)
+user_agent_storage = os.getenv('USER_AGENT_STORAGE', 'parsed').strip().lower()
+if user_agent_storage not in ('raw', 'both', 'parsed'):
+    raise ValueError(f'Invalid USER_AGENT_STORAGE: {user_agent_storage} (expected raw, both or parsed)')
 
+# Token required in the X-Admin-Token header for /api/admin/* endpoints.
+# When unset, admin endpoints are disabled.
+admin_api_token = os.getenv('ADMIN_API_TOKEN', '')
 
-def validate_email(email):
-    """Validate email format"""
-    pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-    return re.match(pattern, email) is not None
+# Login analytics served from /api/admin/analytics, refreshed incrementally
+login_analytics = LoginAnalytics(
+    login_history_layout,
+    utc_offset_minutes=int(os.getenv('ANALYTICS_UTC_OFFSET_MINUTES', 0)),
+    overlap_seconds=int(os.getenv('ANALYTICS_OVERLAP_SECONDS', 60)),
+)
+analytics_refresh_seconds = int(os.getenv('ANALYTICS_REFRESH_SECONDS', 300))
 
+# Real-time login feed served from /api/admin/login-events; events come from
+# this process' handlers (process) or a shared Firestore listener (firestore)
+login_events_source = os.getenv('LOGIN_EVENTS_SOURCE', 'process').strip().lower()
+if login_events_source not in ('process', 'firestore'):
+    raise ValueError(f'Invalid LOGIN_EVENTS_SOURCE: {login_events_source} (expected process or firestore)')
+# Each stream holds a worker thread/connection; gunicorn.conf.py lowers the
+# cap so LOGIN_EVENTS_RESERVED_SLOTS stay free for normal requests
+login_events = LoginEventBroker(
+    max_subscribers=int(os.getenv('LOGIN_EVENTS_MAX_SUBSCRIBERS', 4)),
+    max_queue=int(os.getenv('LOGIN_EVENTS_QUEUE_SIZE', 100)),
+    listener_window=int(os.getenv('LOGIN_EVENTS_WINDOW', 500)),
+    reserved_slots=int(os.getenv('LOGIN_EVENTS_RESERVED_SLOTS', 8)),
+)
+app.extensions['login_events'] = login_events
 
-def validate_phone(phone):
-    """Validate E.164 phone format"""
-    pattern = r'^\+\d{10,15}$'
-    return re.match(pattern, phone) is not None
+# Request profiling: a sampled fraction of requests (or admin requests sending
+# X-Profile-Request: 1) run under cProfile; slow requests are captured with a
+# per-phase timing breakdown. Both are served from /api/admin/profiling.
+request_profiler = RequestProfiler(
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', 0)),
+    slow_ms=float(os.getenv('SLOW_REQUEST_MS', 1000)),
+    buffer_size=int(os.getenv('PROFILE_BUFFER_SIZE', 50)),
+    output_dir=os.getenv('PROFILE_OUTPUT_DIR') or None,
+    force_profile=lambda: request.headers.get('X-Profile-Request') == '1' and is_admin_request(),
+)
+request_profiler.init_app(app)
+
+# Admin user search (/api/admin/users/search, opt-in with USER_SEARCH_INDEX=1):
+# an in-process index over user names, emails and addresses, built in the
+# background on a worker's first search and rebuilt every
+# USER_SEARCH_REFRESH_SECONDS to pick up other workers' writes
+user_search_enabled = os.getenv('USER_SEARCH_INDEX', '0').strip().lower() in ('1', 'true', 'yes')
+user_search_index = UserSearchIndex(
+    page_size=int(os.getenv('USER_SEARCH_PAGE_SIZE', 500)),
+    refresh_seconds=int(os.getenv('USER_SEARCH_REFRESH_SECONDS', 900)),
+)
+
+# Shared pool used to run independent Firestore calls of a single request concurrently
+backend_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BACKEND_POOL_WORKERS', 16)),
+    thread_name_prefix='firestore',
+)
+
+# Fields that must never be returned in user profile responses
+SENSITIVE_FIELDS = ['password', 'token', 'ssn', 'socialSecurityNumber', 'apiKey', 'secretKey', 'accessToken', 'refreshToken']
+
+
+def validate_body(schema):
+    """
+    Validate the JSON body of the current request against a schema (see schemas.py).
+    
+    Returns:
+        tuple: (body, errors) - normalized fields and a map of field errors
+    """
+    data = request.get_json(silent=True)
+    with phase('validate'):
+        return schema.validate(data)
+
+
+def validation_error(errors):
+    """Build the 400 response listing every field error"""
+    return jsonify({
+        'success': False,
+        'error': schemas.error_message(errors),
+        'errors': errors
+    }), 400
 
 
 def normalize_phone_for_path(phone):
@@ -88,71 +180,133 @@ def normalize_email_for_path(email):
     return email.lower().replace('@', '_at_').replace('.', '_dot_')
 
 
-def validate_ip_address(ip_str):
-    """
-    Validate if a string is a valid IPv4 or IPv6 address.
-    
-    Args:
-        ip_str: String to validate as an IP address
-        
-    Returns:
-        bool: True if valid IP address, False otherwise
-    """
-    try:
-        ipaddress.ip_address(ip_str.strip())
-        return True
-    except (ValueError, AttributeError):
-        return False
+def remove_sensitive_fields(user_data):
+    """Remove sensitive fields from a user profile before returning it"""
+    for field in SENSITIVE_FIELDS:
+        user_data.pop(field, None)
+    return user_data
+
+
+def serialize_login_record(doc):
+    """Convert a login history document snapshot into a JSON-serializable dict"""
+    data = doc.to_dict()
+    data['id'] = doc.id
+    # The shard bucket of the sharded/per_user layouts is a storage detail
+    data.pop('shard', None)
+    # Convert timestamp if it exists
+    if 'timestamp' in data and data['timestamp']:
+        if hasattr(data['timestamp'], 'timestamp'):
+            data['timestamp'] = data['timestamp'].timestamp()
+    return data
 
 
 def get_client_ip_address():
     """
     Safely extract the client IP address from the request.
     
-    This function prioritizes request.remote_addr (which is set by the WSGI server
-    and is not spoofable) and only falls back to X-Forwarded-For header when
-    behind a trusted proxy/load balancer.
+    request.remote_addr is set by the WSGI server and cannot be spoofed by the
+    client. The X-Forwarded-For header is only honoured when remote_addr is one
+    of the trusted proxies configured in TRUSTED_PROXIES; the chain is then
+    walked right-to-left and the first address that is not a trusted proxy is
+    taken as the client (see client_ip.resolve_client_ip).
     
-    IMPORTANT SECURITY NOTE: The X-Forwarded-For header can be spoofed by clients
-    and must ONLY be trusted when:
-    - The application is deployed behind a trusted proxy/load balancer
-    - The proxy/load balancer strips or overwrites any existing X-Forwarded-For header
-    - The application is configured to trust specific proxy IPs (not implemented here
-      but should be configured at the deployment/proxy level)
+    If remote_addr is missing or invalid, X-Forwarded-For is ignored since the
+    sender cannot be verified.
     
-    When using X-Forwarded-For:
-    - Takes the first (leftmost) IP from the comma-separated list (this is the
-      original client IP as seen by the first proxy)
-    - Strips whitespace from the IP address
-    - Validates the IP address format (IPv4 or IPv6)
+    The result is cached on flask.g so repeated calls within a request do not
+    re-parse the header.
     
     Returns:
         str: The client IP address, or 'unknown' if unable to determine
     """
-    # Prefer request.remote_addr - this is set by the WSGI server and cannot be
-    # spoofed by the client. It represents the direct peer connection.
-    if request.remote_addr:
-        # Validate it's a proper IP address (defensive programming)
-        if validate_ip_address(request.remote_addr):
-            return request.remote_addr.strip()
+    if 'client_ip' not in g:
+        g.client_ip = resolve_client_ip(
+            request.remote_addr,
+            request.headers.get('X-Forwarded-For'),
+            trusted_proxies,
+        )
+    return g.client_ip
+
+
+def enrich_location(login_data):
+    """Add `country` and `asn` to a login record from the geolocation table"""
+    if geoip_table is None:
+        return login_data
+    ip = parse_ip(login_data.get('ipAddress') or '')
+    if ip is None:
+        return login_data
+    location = geoip_table.lookup(ip)
+    if location:
+        login_data['country'] = location['country']
+        login_data['asn'] = location['asn']
+    return login_data
+
+
+def enrich_user_agent(login_data):
+    """Add parsed browser/OS/device families to a login record"""
+    if user_agent_storage == 'raw':
+        return login_data
+    login_data.update(user_agent_parser.parse_user_agent(login_data.get('userAgent')))
+    if user_agent_storage == 'parsed':
+        login_data.pop('userAgent', None)
+    return login_data
+
+
+def build_login_record(uid, phone_number):
+    """
+    Build the login history record for the current request.
     
-    # Fall back to X-Forwarded-For only when behind a trusted proxy
-    # WARNING: Only use this if you're behind a trusted proxy/load balancer that
-    # strips client-provided X-Forwarded-For headers. In production, configure
-    # your proxy to only accept X-Forwarded-For from trusted sources.
-    x_forwarded_for = request.headers.get('X-Forwarded-For')
-    if x_forwarded_for:
-        # X-Forwarded-For can contain multiple IPs: "client, proxy1, proxy2"
-        # The first (leftmost) IP is the original client IP
-        ips = [ip.strip() for ip in x_forwarded_for.split(',')]
-        if ips:
-            first_ip = ips[0].strip()
-            # Validate the IP address format
-            if validate_ip_address(first_ip):
-                return first_ip
+    Captures the user agent and client IP, then runs the enrichment stages
+    on the record before it is written.
     
-    # If we can't determine a valid IP, return 'unknown'
-    return 'unknown'
+    Args:
+        uid: Firebase Auth UID of the user who logged in
+        phone_number: Phone number used for login (E.164 format)
+        
+    Returns:
+        dict: Login record ready for login_history_layout.write
+    """
+    user_agent = request.headers.get('User-Agent', 'unknown')
+    ip_address = get_client_ip_address()
+    login_data = login_history_layout.build_record(uid, phone_number, user_agent, ip_address)
+    enrich_location(login_data)
+    enrich_user_agent(login_data)
+    return login_data
+
+
+def publish_login(login_ref, login_data):
+    """Publish a written login record to the in-process login feed"""
+    if login_events_source == 'process':
+        login_events.publish(login_event(login_ref.id, login_data))
+
+
+def is_admin_request():
+    """Check whether the current request carries the configured admin token"""
+    if not admin_api_token:
+        return False
+    token = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(token.encode('utf-8'), admin_api_token.encode('utf-8'))
+
+
+def require_admin(view):
+    """
+    Restrict an endpoint to callers presenting the ADMIN_API_TOKEN in the
+    X-Admin-Token header. Admin endpoints respond 404 when no token is configured.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not admin_api_token:
+            return jsonify({
+                'success': False,
+                'error': 'Not found'
+            }), 404
+        if not is_admin_request():
+            return jsonify({
+                'success': False,
+                'error': 'Unauthorized'
+            }), 401
+        return view(*args, **kwargs)
+    return wrapper
 
 
 @app.route('/health', methods=['GET'])
@@ -176,40 +330,18 @@ def create_user_with_login():
     }
     """
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['uid', 'name', 'email', 'phoneNumber', 'address']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
-        
-        uid = data['uid']
-        name = data['name'].strip()
-        email = data['email'].strip().lower()
-        phone_number = data['phoneNumber'].strip()
-        address = data['address'].strip()
-        
-        # Validate email format
-        if not validate_email(email):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid email format'
-            }), 400
+        body, errors = validate_body(schemas.NEW_USER)
+        if errors:
+            return validation_error(errors)
         
-        # Validate phone format
-        if not validate_phone(phone_number):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid phone number format. Must be in E.164 format (e.g., +1234567890)'
-            }), 400
+        uid = body['uid']
+        name = body['name']
+        email = body['email']
+        phone_number = body['phoneNumber']
+        address = body['address']
         
-        # Get user agent and IP from request
-        user_agent = request.headers.get('User-Agent', 'unknown')
-        ip_address = get_client_ip_address()
+        # Build the enriched login record from the request
+        login_data = build_login_record(uid, phone_number)
         
         # Normalize phone and email for marker document paths
         normalized_phone = normalize_phone_for_path(phone_number)
@@ -267,18 +399,13 @@ def create_user_with_login():
             transaction.set(email_marker_ref, email_marker_data)
             
             # Record login history
-            login_data = {
-                'uid': uid,
-                'phoneNumber': phone_number,
-                'timestamp': firestore.SERVER_TIMESTAMP,
-                'userAgent': user_agent,
-                'ipAddress': ip_address,
-            }
-            login_ref = db.collection('loginHistory').document()
-            transaction.set(login_ref, login_data)
+            return login_history_layout.write(db, uid, login_data, transaction=transaction)
         
         # Execute transaction
-        create_user_and_login(transaction)
+        with phase('firestore.transaction'):
+            login_ref = create_user_and_login(transaction)
+        publish_login(login_ref, login_data)
+        user_search_index.upsert(uid, {'name': name, 'email': email, 'address': address, 'phoneNumber': phone_number})
         
         return jsonify({
             'success': True,
@@ -299,10 +426,9 @@ def create_user_with_login():
             'success': False,
             'error': error_msg
         }), 409
-    except Exception as e:
+    except Exception:
         # Handle other errors (transaction failures, network issues, etc.)
-        print(f"Error in create_user_with_login: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error in create_user_with_login")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
@@ -323,40 +449,20 @@ def register_user():
     }
     """
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['uid', 'name', 'email', 'phoneNumber', 'address']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
-        
-        uid = data['uid']
-        name = data['name'].strip()
-        email = data['email'].strip().lower()
-        phone_number = data['phoneNumber'].strip()
-        address = data['address'].strip()
-        
-        # Validate email format
-        if not validate_email(email):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid email format'
-            }), 400
+        body, errors = validate_body(schemas.NEW_USER)
+        if errors:
+            return validation_error(errors)
         
-        # Validate phone format
-        if not validate_phone(phone_number):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid phone number format. Must be in E.164 format (e.g., +1234567890)'
-            }), 400
+        uid = body['uid']
+        name = body['name']
+        email = body['email']
+        phone_number = body['phoneNumber']
+        address = body['address']
         
         # Check if user already exists
         user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        with phase('firestore.users.get'):
+            user_doc = user_ref.get()
         
         if user_doc.exists:
             return jsonify({
@@ -366,7 +472,8 @@ def register_user():
         
         # Check if phone number is already registered
         phone_query = db.collection('users').where('phoneNumber', '==', phone_number).limit(1)
-        phone_docs = phone_query.get()
+        with phase('firestore.users.query'):
+            phone_docs = phone_query.get()
         if phone_docs:
             return jsonify({
                 'success': False,
@@ -375,7 +482,8 @@ def register_user():
         
         # Check if email is already registered
         email_query = db.collection('users').where('email', '==', email).limit(1)
-        email_docs = email_query.get()
+        with phase('firestore.users.query'):
+            email_docs = email_query.get()
         if email_docs:
             return jsonify({
                 'success': False,
@@ -393,7 +501,9 @@ def register_user():
             'updatedAt': firestore.SERVER_TIMESTAMP,
         }
         
-        user_ref.set(user_data)
+        with phase('firestore.users.set'):
+            user_ref.set(user_data)
+        user_search_index.upsert(uid, user_data)
         
         return jsonify({
             'success': True,
@@ -406,9 +516,8 @@ def register_user():
             }
         }), 201
         
-    except Exception as e:
-        print(f"Error in register_user: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in register_user")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
@@ -425,34 +534,24 @@ def check_user():
     }
     """
     try:
-        data = request.get_json()
-        phone_number = data.get('phoneNumber')
-        
-        if not phone_number:
-            return jsonify({
-                'success': False,
-                'error': 'Phone number is required'
-            }), 400
+        body, errors = validate_body(schemas.CHECK_USER)
+        if errors:
+            return validation_error(errors)
         
-        # Validate phone format
-        if not validate_phone(phone_number):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid phone number format'
-            }), 400
+        phone_number = body['phoneNumber']
         
         # Check if user exists
         query = db.collection('users').where('phoneNumber', '==', phone_number).limit(1)
-        docs = query.get()
+        with phase('firestore.users.query'):
+            docs = query.get()
         
         return jsonify({
             'success': True,
             'exists': len(docs) > 0
         }), 200
         
-    except Exception as e:
-        print(f"Error in check_user: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in check_user")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
@@ -470,28 +569,83 @@ def record_login():
     }
     """
     try:
-        data = request.get_json()
-        uid = data.get('uid')
-        phone_number = data.get('phoneNumber')
+        body, errors = validate_body(schemas.RECORD_LOGIN)
+        if errors:
+            return validation_error(errors)
+        
+        uid = body['uid']
+        phone_number = body['phoneNumber']
+        
+        # Verify user exists in users collection (backend safeguard)
+        user_ref = db.collection('users').document(uid)
+        with phase('firestore.users.get'):
+            user_doc = user_ref.get()
         
-        if not uid or not phone_number:
+        if not user_doc.exists:
             return jsonify({
                 'success': False,
-                'error': 'UID and phone number are required'
-            }), 400
+                'error': 'User does not exist'
+            }), 404
         
-        # Validate phone format
-        if not validate_phone(phone_number):
+        # Verify phone number matches the user's registered phone number
+        user_data = user_doc.to_dict()
+        if user_data.get('phoneNumber') != phone_number:
             return jsonify({
                 'success': False,
-                'error': 'Invalid phone number format'
+                'error': 'Phone number does not match registered user'
             }), 400
         
-        # Verify user exists in users collection (backend safeguard)
+        # Record login history
+        login_data = build_login_record(uid, phone_number)
+        with phase('firestore.loginHistory.write'):
+            login_ref = login_history_layout.write(db, uid, login_data)
+        publish_login(login_ref, login_data)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Login recorded successfully'
+        }), 201
+        
+    except Exception:
+        logger.exception("Error in record_login")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+
+@app.route('/api/session/bootstrap', methods=['POST'])
+def bootstrap_session():
+    """
+    Record a login and return the user profile and recent login history in one call.
+    The profile read and the history query run concurrently on the shared backend
+    pool; the login record is written once the user and phone number are verified.
+    Expected JSON body:
+    {
+        "uid": "firebase-auth-uid",
+        "phoneNumber": "+1234567890",
+        "historyLimit": 10 (optional, max: 100)
+    }
+    """
+    try:
+        body, errors = validate_body(schemas.BOOTSTRAP_SESSION)
+        if errors:
+            return validation_error(errors)
+        
+        uid = body['uid']
+        phone_number = body['phoneNumber']
+        history_limit = body['historyLimit']  # Clamped to 1-100
+        
+        # Fetch profile and recent history concurrently
         user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        history_query = login_history_layout.query(db, uid, history_limit)
+        user_future = backend_executor.submit(user_ref.get)
+        history_future = backend_executor.submit(history_query.get)
         
+        with phase('firestore.users.get'):
+            user_doc = user_future.result()
         if not user_doc.exists:
+            history_future.cancel()
             return jsonify({
                 'success': False,
                 'error': 'User does not exist'
@@ -500,34 +654,38 @@ def record_login():
         # Verify phone number matches the user's registered phone number
         user_data = user_doc.to_dict()
         if user_data.get('phoneNumber') != phone_number:
+            history_future.cancel()
             return jsonify({
                 'success': False,
                 'error': 'Phone number does not match registered user'
             }), 400
         
-        # Get user agent and IP from request
-        user_agent = request.headers.get('User-Agent', 'unknown')
-        ip_address = get_client_ip_address()
+        # Record login history while the history query is still in flight
+        login_data = build_login_record(uid, phone_number)
+        with phase('firestore.loginHistory.write'):
+            login_ref = login_history_layout.write(db, uid, login_data)
+        publish_login(login_ref, login_data)
         
-        # Record login history
-        login_data = {
-            'uid': uid,
-            'phoneNumber': phone_number,
-            'timestamp': firestore.SERVER_TIMESTAMP,
-            'userAgent': user_agent,
-            'ipAddress': ip_address,
-        }
+        with phase('firestore.loginHistory.query'):
+            history = [serialize_login_record(doc) for doc in history_future.result()]
         
-        db.collection('loginHistory').add(login_data)
+        # The query may have run before the write landed; include the new login
+        # with a local timestamp (the stored one is set by the server)
+        if not any(entry['id'] == login_ref.id for entry in history):
+            login_data['id'] = login_ref.id
+            login_data['timestamp'] = time.time()
+            history = [login_data] + history[:history_limit - 1]
         
         return jsonify({
             'success': True,
-            'message': 'Login recorded successfully'
-        }), 201
+            'message': 'Login recorded successfully',
+            'user': remove_sensitive_fields(user_data),
+            'history': history,
+            'count': len(history)
+        }), 200
         
-    except Exception as e:
-        print(f"Error in record_login: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in bootstrap_session")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
@@ -552,22 +710,12 @@ def get_login_history(uid):
         limit = min(limit, 100)  # Cap at 100
         
         # Query login history
-        query = db.collection('loginHistory')\
-                  .where('uid', '==', uid)\
-                  .order_by('timestamp', direction=firestore.Query.DESCENDING)\
-                  .limit(limit)
-        
-        docs = query.get()
-        
-        history = []
-        for doc in docs:
-            data = doc.to_dict()
-            data['id'] = doc.id
-            # Convert timestamp if it exists
-            if 'timestamp' in data and data['timestamp']:
-                if hasattr(data['timestamp'], 'timestamp'):
-                    data['timestamp'] = data['timestamp'].timestamp()
-            history.append(data)
+        query = login_history_layout.query(db, uid, limit)
+        
+        with phase('firestore.loginHistory.query'):
+            docs = query.get()
+        
+        history = [serialize_login_record(doc) for doc in docs]
         
         return jsonify({
             'success': True,
@@ -575,9 +723,8 @@ def get_login_history(uid):
             'count': len(history)
         }), 200
         
-    except Exception as e:
-        print(f"Error in get_login_history: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in get_login_history")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
@@ -597,7 +744,8 @@ def get_user(uid):
             }), 400
         
         user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        with phase('firestore.users.get'):
+            user_doc = user_ref.get()
         
         if not user_doc.exists:
             return jsonify({
@@ -605,21 +753,16 @@ def get_user(uid):
                 'error': 'User not found'
             }), 404
         
-        user_data = user_doc.to_dict()
-        
         # Remove sensitive fields before returning
-        sensitive_fields = ['password', 'token', 'ssn', 'socialSecurityNumber', 'apiKey', 'secretKey', 'accessToken', 'refreshToken']
-        for field in sensitive_fields:
-            user_data.pop(field, None)
+        user_data = remove_sensitive_fields(user_doc.to_dict())
         
         return jsonify({
             'success': True,
             'user': user_data
         }), 200
         
-    except Exception as e:
-        print(f"Error in get_user: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in get_user")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
@@ -645,15 +788,19 @@ def update_user(uid):
                 'error': 'UID is required'
             }), 400
         
-        data = request.get_json()
-        if not data:
+        if not request.get_json(silent=True):
             return jsonify({
                 'success': False,
                 'error': 'Request body is required'
             }), 400
         
+        body, errors = validate_body(schemas.UPDATE_USER)
+        if errors:
+            return validation_error(errors)
+        
         user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        with phase('firestore.users.get'):
+            user_doc = user_ref.get()
         
         if not user_doc.exists:
             return jsonify({
@@ -665,56 +812,47 @@ def update_user(uid):
         update_data = {}
         
         # Update name if provided
-        if 'name' in data:
-            name = data['name'].strip()
-            if name:
-                update_data['name'] = name
+        if 'name' in body:
+            update_data['name'] = body['name']
         
         # Update email if provided
-        if 'email' in data:
-            email = data['email'].strip().lower()
-            if email:
-                # Validate email format
-                if not validate_email(email):
+        if 'email' in body:
+            email = body['email']
+            # Check if email is already taken by another user
+            if email != user_data.get('email'):
+                normalized_email = normalize_email_for_path(email)
+                email_marker_ref = db.collection('users_by_email').document(normalized_email)
+                with phase('firestore.users_by_email.get'):
+                    email_marker_doc = email_marker_ref.get()
+                
+                if email_marker_doc.exists:
                     return jsonify({
                         'success': False,
-                        'error': 'Invalid email format'
-                    }), 400
+                        'error': 'Email already registered'
+                    }), 409
                 
-                # Check if email is already taken by another user
-                if email != user_data.get('email'):
-                    normalized_email = normalize_email_for_path(email)
-                    email_marker_ref = db.collection('users_by_email').document(normalized_email)
-                    email_marker_doc = email_marker_ref.get()
-                    
-                    if email_marker_doc.exists:
-                        return jsonify({
-                            'success': False,
-                            'error': 'Email already registered'
-                        }), 409
-                    
-                    # Update email marker if email changed
-                    old_email = user_data.get('email')
-                    if old_email:
-                        old_normalized_email = normalize_email_for_path(old_email)
-                        old_email_marker_ref = db.collection('users_by_email').document(old_normalized_email)
+                # Update email marker if email changed
+                old_email = user_data.get('email')
+                if old_email:
+                    old_normalized_email = normalize_email_for_path(old_email)
+                    old_email_marker_ref = db.collection('users_by_email').document(old_normalized_email)
+                    with phase('firestore.users_by_email.delete'):
                         old_email_marker_ref.delete()
-                    
-                    # Create new email marker
-                    email_marker_data = {
-                        'uid': uid,
-                        'email': email,
-                        'createdAt': firestore.SERVER_TIMESTAMP,
-                    }
-                    email_marker_ref.set(email_marker_data)
                 
-                update_data['email'] = email
+                # Create new email marker
+                email_marker_data = {
+                    'uid': uid,
+                    'email': email,
+                    'createdAt': firestore.SERVER_TIMESTAMP,
+                }
+                with phase('firestore.users_by_email.set'):
+                    email_marker_ref.set(email_marker_data)
+            
+            update_data['email'] = email
         
         # Update address if provided
-        if 'address' in data:
-            address = data['address'].strip()
-            if address:
-                update_data['address'] = address
+        if 'address' in body:
+            update_data['address'] = body['address']
         
         # If no valid updates, return error
         if not update_data:
@@ -727,16 +865,16 @@ def update_user(uid):
         update_data['updatedAt'] = firestore.SERVER_TIMESTAMP
         
         # Update user document
-        user_ref.update(update_data)
+        with phase('firestore.users.update'):
+            user_ref.update(update_data)
         
         # Get updated user data
-        updated_user_doc = user_ref.get()
-        updated_user_data = updated_user_doc.to_dict()
+        with phase('firestore.users.get'):
+            updated_user_doc = user_ref.get()
         
         # Remove sensitive fields before returning
-        sensitive_fields = ['password', 'token', 'ssn', 'socialSecurityNumber', 'apiKey', 'secretKey', 'accessToken', 'refreshToken']
-        for field in sensitive_fields:
-            updated_user_data.pop(field, None)
+        updated_user_data = remove_sensitive_fields(updated_user_doc.to_dict())
+        user_search_index.upsert(uid, updated_user_data)
         
         return jsonify({
             'success': True,
@@ -744,9 +882,8 @@ def update_user(uid):
             'user': updated_user_data
         }), 200
         
-    except Exception as e:
-        print(f"Error in update_user: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in update_user")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
@@ -763,17 +900,15 @@ def unregister_user():
     }
     """
     try:
-        data = request.get_json()
-        uid = data.get('uid')
-        
-        if not uid:
-            return jsonify({
-                'success': False,
-                'error': 'UID is required'
-            }), 400
+        body, errors = validate_body(schemas.UNREGISTER_USER)
+        if errors:
+            return validation_error(errors)
         
+        uid = body['uid']
+
         user_ref = db.collection('users').document(uid)
-        user_doc = user_ref.get()
+        with phase('firestore.users.get'):
+            user_doc = user_ref.get()
         
         if not user_doc.exists:
             return jsonify({
@@ -782,24 +917,194 @@ def unregister_user():
             }), 404
         
         # Delete user document
-        user_ref.delete()
+        with phase('firestore.users.delete'):
+            user_ref.delete()
+        user_search_index.remove(uid)
         
         return jsonify({
             'success': True,
             'message': 'User unregistered successfully'
         }), 200
         
-    except Exception as e:
-        print(f"Error in unregister_user: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error in unregister_user")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@require_admin
+def admin_metrics():
+    """
+    Get in-process metrics (requires X-Admin-Token header)
+    """
+    return jsonify({
+        'success': True,
+        'metrics': {
+            'userAgentCache': user_agent_parser.cache_stats(),
+            'loginEvents': dict(login_events.stats, subscribers=login_events.subscriber_count()),
+            'logging': {
+                'enqueued': log_handler.enqueued,
+                'dropped': log_handler.dropped,
+                'suppressed': log_sampler.suppressed_total,
+            },
+            'userSearch': user_search_index.stats(),
+        }
+    }), 200
+
+
+@app.route('/api/admin/users/search', methods=['GET'])
+@require_admin
+def admin_search_users():
+    """
+    Search users by name, email or address from the in-process index; no
+    Firestore queries (requires X-Admin-Token header)
+    Query params: q (words or word prefixes, all must match),
+    limit (default: 20, max: 100), offset (default: 0)
+    """
+    if not user_search_enabled:
+        return jsonify({
+            'success': False,
+            'error': 'User search is disabled'
+        }), 503
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': 'Query parameter q is required'
+        }), 400
+    
+    # Builds on this worker's first search, and rebuilds when stale
+    user_search_index.start_build(db)
+    if not user_search_index.ready:
+        return jsonify({
+            'success': False,
+            'error': 'User search index is being built, try again shortly'
+        }), 503
+    
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, 100))  # Cap at 100
+    offset = max(0, request.args.get('offset', 0, type=int))
+    
+    with phase('search'):
+        results, total = user_search_index.search(query, limit=limit, offset=offset)
+    
+    return jsonify({
+        'success': True,
+        'query': query,
+        'results': results,
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'indexedAt': user_search_index.built_at,
+    }), 200
+
+
+@app.route('/api/admin/profiling', methods=['GET'])
+@require_admin
+def admin_profiling():
+    """
+    Get captured slow requests (with per-phase timings) and recent cProfile
+    summaries (requires X-Admin-Token header)
+    Query params: limit (default: 20, max: 100)
+    """
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, 100))  # Cap at 100
+    
+    slow_requests, profiles = request_profiler.snapshot()
+    return jsonify({
+        'success': True,
+        'slowRequestThresholdMs': request_profiler.slow_ms,
+        'sampleRate': request_profiler.sample_rate,
+        'stats': request_profiler.stats(),
+        'slowRequests': slow_requests[:limit],
+        'profiles': profiles[:limit],
+    }), 200
+
+
+@app.route('/api/admin/analytics', methods=['GET'])
+@require_admin
+def admin_analytics():
+    """
+    Get login analytics: daily active users, logins per hour and new
+    registrations per day (requires X-Admin-Token header)
+    Query params: days (default: 30, max: 366), refresh (force an incremental refresh)
+    """
+    try:
+        days = request.args.get('days', 30, type=int)
+        days = max(1, min(days, 366))  # Cap at one year
+        
+        if request.args.get('refresh'):
+            login_analytics.refresh(db)
+        else:
+            login_analytics.refresh_if_stale(db, analytics_refresh_seconds)
+        
+        return jsonify({
+            'success': True,
+            'analytics': login_analytics.report(days)
+        }), 200
+        
+    except Exception:
+        logger.exception("Error in admin_analytics")
         return jsonify({
             'success': False,
             'error': 'Internal server error'
         }), 500
 
 
+@app.route('/api/admin/login-events', methods=['GET'])
+@require_admin
+def admin_login_events():
+    """
+    Stream login events as Server-Sent Events (requires X-Admin-Token header)
+    Query params: uid (optional, comma-separated list of UIDs to follow)
+    """
+    # A sync gunicorn worker only heartbeats between requests, so the arbiter
+    # would kill it once the stream outlives the worker timeout
+    server = request.environ.get('SERVER_SOFTWARE', '')
+    if server.startswith('gunicorn') and not request.environ.get('wsgi.multithread'):
+        return jsonify({
+            'success': False,
+            'error': 'Login feed needs threaded or async workers'
+        }), 503
+    
+    uids = [uid.strip() for uid in request.args.get('uid', '').split(',') if uid.strip()]
+    
+    if login_events_source == 'firestore':
+        try:
+            login_events.start_listener(db, login_history_layout)
+        except Exception:
+            logger.exception("Error starting login events listener")
+            return jsonify({
+                'success': False,
+                'error': 'Login feed unavailable'
+            }), 503
+    
+    subscription = login_events.subscribe(uids)
+    if subscription is None:
+        return jsonify({
+            'success': False,
+            'error': 'Too many subscribers'
+        }), 503
+    
+    return Response(
+        stream_with_context(login_events.stream(subscription)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Disable response buffering in nginx-style proxies
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))  # Changed default to 5001 to avoid AirPlay conflict
     debug = os.getenv('FLASK_ENV') == 'development'
+    if warm_up_enabled():
+        warm_up()
     app.run(host='0.0.0.0', port=port, debug=debug)
 
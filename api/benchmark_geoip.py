@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Lookup benchmark for the compiled geolocation table.
+
+Uses the table from --table (or GEOIP_DATABASE); without one, a synthetic
+table with --ranges random IPv4 ranges is compiled into a temporary file.
+
+Example:
+  python3 benchmark_geoip.py --ranges 500000 --lookups 200000
+"""
+import argparse
+import ipaddress
+import random
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path to import geoip
+sys.path.insert(0, os.path.dirname(__file__))
+
+from geoip import GeoIPTable, compile_table
+
+COUNTRIES = ['IN', 'US', 'GB', 'DE', 'SG', 'AU', 'CA', 'NP', 'BD', 'AE']
+
+
+def synthetic_ranges(count, seed=42):
+    """Yield `count` non-overlapping IPv4 ranges spread over the address space"""
+    rng = random.Random(seed)
+    step = (2 ** 32) // count
+    for i in range(count):
+        start = i * step
+        end = start + rng.randrange(1, step)
+        yield (ipaddress.IPv4Address(start), ipaddress.IPv4Address(end),
+               rng.choice(COUNTRIES), rng.randrange(1, 400000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark geolocation table lookups')
+    parser.add_argument('--table', default=os.getenv('GEOIP_DATABASE'), help='Compiled table to benchmark')
+    parser.add_argument('--ranges', type=int, default=300000, help='Synthetic ranges when no table is given')
+    parser.add_argument('--lookups', type=int, default=100000, help='Number of lookups')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    path = args.table
+    if not path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, 'geoip.bin')
+        started = time.perf_counter()
+        stats = compile_table(synthetic_ranges(args.ranges), path)
+        print(f"Compiled synthetic table: {stats['ipv4']} ranges in {time.perf_counter() - started:.2f}s "
+              f"({os.path.getsize(path) / 1024 / 1024:.1f} MiB)")
+
+    table = GeoIPTable(path)
+    rng = random.Random(7)
+    ips = [ipaddress.IPv4Address(rng.getrandbits(32)) for _ in range(args.lookups)]
+
+    # Warm the page cache so the run measures lookups, not disk reads
+    for ip in ips[:1000]:
+        table.lookup(ip)
+
+    hits = 0
+    started = time.perf_counter()
+    for ip in ips:
+        if table.lookup(ip) is not None:
+            hits += 1
+    elapsed = time.perf_counter() - started
+
+    print("=" * 50)
+    print(f"Table ranges:   {len(table)}")
+    print(f"Lookups:        {args.lookups}")
+    print(f"Hit rate:       {hits / args.lookups * 100:.1f}%")
+    print(f"Per lookup:     {elapsed / args.lookups * 1e6:.2f} µs")
+    print(f"Lookups/second: {args.lookups / elapsed:,.0f}")
+
+    table.close()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
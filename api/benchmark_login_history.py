@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Write-throughput benchmark for the login history storage layouts.
+
+Runs concurrent login-record writes through each layout and reports
+throughput and latency percentiles. Sequential-index hotspots only show up
+against a real Firestore project, so run this against a staging project; the
+Firestore emulator (FIRESTORE_EMULATOR_HOST) is useful to smoke-test the
+script but does not model hotspots.
+
+Example:
+  python3 benchmark_login_history.py --layouts flat,per_user,sharded --writes 2000 --writers 64
+"""
+import argparse
+import statistics
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import app
+sys.path.insert(0, os.path.dirname(__file__))
+
+from login_history import get_layout, LAYOUTS
+
+BENCHMARK_UID_PREFIX = 'bench-login-'
+
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_layout(db, layout, writes, writers, users):
+    """
+    Write `writes` login records through `layout` using `writers` threads.
+
+    Returns:
+        tuple: (summary dict, list of written document references)
+    """
+    def write_one(i):
+        uid = f'{BENCHMARK_UID_PREFIX}{i % users}'
+        data = layout.build_record(uid, '+10000000000', 'benchmark_login_history', '127.0.0.1')
+        started = time.perf_counter()
+        ref = layout.write(db, uid, data)
+        return time.perf_counter() - started, ref
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        results = list(executor.map(write_one, range(writes)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    summary = {
+        'layout': layout.name,
+        'writes': writes,
+        'seconds': elapsed,
+        'throughput': writes / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+    return summary, [ref for _, ref in results]
+
+
+def cleanup(db, refs):
+    """Delete benchmark records in batches"""
+    for start in range(0, len(refs), 500):
+        batch = db.batch()
+        for ref in refs[start:start + 500]:
+            batch.delete(ref)
+        batch.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare login history write throughput across layouts')
+    parser.add_argument('--layouts', default=','.join(LAYOUTS),
+                        help='Comma-separated layouts to benchmark (default: all)')
+    parser.add_argument('--writes', type=int, default=1000, help='Records to write per layout')
+    parser.add_argument('--writers', type=int, default=32, help='Concurrent writer threads')
+    parser.add_argument('--users', type=int, default=100, help='Distinct benchmark users')
+    parser.add_argument('--shards', type=int, default=None, help='Shard count for the sharded layout')
+    parser.add_argument('--keep', action='store_true', help='Keep benchmark records instead of deleting them')
+    args = parser.parse_args()
+
+    from app import db
+
+    layouts = [get_layout(name, args.shards) for name in args.layouts.split(',') if name.strip()]
+
+    print(f"Login history write benchmark: {args.writes} writes, {args.writers} writers, {args.users} users")
+    print("=" * 78)
+    print(f"{'layout':<10} {'writes/s':>10} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'total s':>10}")
+
+    for layout in layouts:
+        summary, refs = run_layout(db, layout, args.writes, args.writers, args.users)
+        print(f"{summary['layout']:<10} {summary['throughput']:>10.1f} {summary['mean_ms']:>10.1f} "
+              f"{summary['p50_ms']:>10.1f} {summary['p95_ms']:>10.1f} {summary['p99_ms']:>10.1f} "
+              f"{summary['seconds']:>10.2f}")
+        if not args.keep:
+            cleanup(db, refs)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark API cold start: import-to-first-request latency.
+
+Each run starts a fresh Python process, imports app.py and serves first
+requests through the Flask test client, timing:
+
+- import: importing app.py (Flask, Firebase Admin, layouts, tables)
+- client: creating the Firestore client (credentials + gRPC client)
+- warm-up: opening the channel with one document read (--warm-up only;
+  needs a reachable Firestore or FIRESTORE_EMULATOR_HOST)
+- health: GET /health, which never touches Firestore
+- first read: GET /api/user/<uid>, the first request that reads Firestore
+  (a 404 for an unknown uid still reads the document)
+
+"eager" creates the client right after import, as app.py used to; "lazy"
+leaves it to the first request that needs Firestore, so /health is served
+without it and the first read pays for creating the client instead.
+
+With --gunicorn, it also starts gunicorn (with and without --preload) and
+reports the time from launch until /health first answers 200, and until the
+first user read has been served.
+
+Example:
+  python3 benchmark_startup.py --runs 5
+  FIRESTORE_BACKEND=local LOCAL_FIRESTORE_SEED_USERS=1000 python3 benchmark_startup.py --gunicorn
+  FIRESTORE_EMULATOR_HOST=localhost:8080 python3 benchmark_startup.py --warm-up --gunicorn
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {api_dir!r})
+import app
+import firestore_client
+timings = {{'import': time.perf_counter() - started}}
+if {eager!r}:
+    t = time.perf_counter()
+    firestore_client.get_client()
+    timings['client'] = time.perf_counter() - t
+if {warm_up!r}:
+    t = time.perf_counter()
+    firestore_client.warm_up()
+    timings['warm-up'] = time.perf_counter() - t
+client = app.app.test_client()
+t = time.perf_counter()
+response = client.get('/health')
+assert response.status_code == 200, response.status_code
+timings['health'] = time.perf_counter() - t
+t = time.perf_counter()
+response = client.get('/api/user/' + {uid!r})
+assert response.status_code in (200, 404), response.status_code
+timings['first read'] = time.perf_counter() - t
+timings['total'] = time.perf_counter() - started
+app.log_handler.stop()
+print(json.dumps(timings))
+'''
+
+
+def run_child(eager, warm_up, uid):
+    code = CHILD.format(api_dir=API_DIR, eager=eager, warm_up=warm_up, uid=uid)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=API_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'child failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def fetch_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def time_gunicorn(workers, preload, uid, timeout=60):
+    """Seconds from launching gunicorn until /health answers 200, and until the first user read is served"""
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'app:app']
+    if preload:
+        command.insert(3, '--preload')
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=API_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1) as response:
+                    ready = time.perf_counter() - started if response.status == 200 else None
+            except OSError:
+                ready = None
+            if ready is None:
+                time.sleep(0.01)
+                continue
+            status = fetch_status(f'http://127.0.0.1:{port}/api/user/{uid}')
+            if status not in (200, 404):
+                raise RuntimeError(f'GET /api/user/{uid} answered {status}')
+            return ready, time.perf_counter() - started
+        raise RuntimeError('gunicorn did not become ready in time')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def report(label, runs):
+    keys = list(runs[0])
+    print(f"{label:<8} " + "  ".join(
+        f"{key} {statistics.median(run[key] for run in runs) * 1000:7.1f} ms" for key in keys
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark import-to-first-request latency')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh processes per mode')
+    parser.add_argument('--warm-up', action='store_true', help='Include a Firestore warm-up read')
+    parser.add_argument('--gunicorn', action='store_true', help='Also time gunicorn boot to first 200')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers (with --gunicorn)')
+    parser.add_argument('--uid', default='user0000000',
+                        help='User read by the first Firestore request (default: the first seeded local user)')
+    args = parser.parse_args()
+
+    print(f"Cold start: median of {args.runs} fresh processes")
+    print("=" * 50)
+    for label, eager in (('eager', True), ('lazy', False)):
+        report(label, [run_child(eager, args.warm_up, args.uid) for _ in range(args.runs)])
+
+    if args.gunicorn:
+        print()
+        for preload in (False, True):
+            times = [time_gunicorn(args.workers, preload, args.uid) for _ in range(args.runs)]
+            label = f"gunicorn -w {args.workers}{' --preload' if preload else ''}"
+            print(f"{label:<28} ready in {statistics.median(ready for ready, _ in times) * 1000:7.1f} ms  "
+                  f"first read in {statistics.median(read for _, read in times) * 1000:7.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
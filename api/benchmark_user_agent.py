@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark user agent parsing and its LRU cache.
+
+Replays a user agent corpus (one header per line via --corpus, or a built-in
+sample of common mobile/desktop agents) with a skewed popularity
+distribution, and reports uncached vs cached parse cost, cache hit rate and
+the per-record size saved by storing parsed families instead of the raw
+header.
+
+Example:
+  python3 benchmark_user_agent.py --requests 200000 --unique-ratio 0.02
+"""
+import argparse
+import json
+import random
+import sys
+import os
+import time
+
+# Add parent directory to path to import user_agent
+sys.path.insert(0, os.path.dirname(__file__))
+
+import user_agent
+
+SAMPLE_USER_AGENTS = [
+    'Mozilla/5.0 (Linux; Android 13; SM-S911B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 12; RMX3511) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 11; Redmi Note 9 Pro) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 13; CPH2381) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/23.0 Chrome/115.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 11; RMX2185 Build/RP1A; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/118.0.5993.80 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/119.0.6045.169 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (iPad; CPU OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.2210.91',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 12; SM-X200) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Linux; U; Android 10; en-US; RMX1971) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/78.0.3904.108 UCBrowser/13.4.0.1306 Mobile Safari/537.36',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+]
+
+
+def build_workload(corpus, requests, unique_ratio, seed=1):
+    """
+    Build a request sequence with Zipf-like popularity over `corpus`, plus a
+    fraction of one-off agents (build suffixes) that always miss the cache.
+    """
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(corpus))]
+    workload = rng.choices(corpus, weights=weights, k=requests)
+    for i in range(int(requests * unique_ratio)):
+        index = rng.randrange(requests)
+        workload[index] = f'{workload[index]} Build/{rng.getrandbits(48):x}'
+    return workload
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached user agent parsing')
+    parser.add_argument('--corpus', help='File with one User-Agent header per line')
+    parser.add_argument('--requests', type=int, default=100000, help='Number of parse calls')
+    parser.add_argument('--unique-ratio', type=float, default=0.01, help='Fraction of one-off agents')
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, 'r', encoding='utf-8') as f:
+            corpus = [line.strip() for line in f if line.strip()]
+    else:
+        corpus = SAMPLE_USER_AGENTS
+
+    workload = build_workload(corpus, args.requests, args.unique_ratio)
+
+    # Uncached: call the parser directly, bypassing the LRU cache
+    started = time.perf_counter()
+    for ua in workload:
+        user_agent._parse.__wrapped__(ua[:user_agent.MAX_USER_AGENT_LENGTH])
+    uncached = time.perf_counter() - started
+
+    user_agent.clear_cache()
+    started = time.perf_counter()
+    for ua in workload:
+        user_agent.parse_user_agent(ua)
+    cached = time.perf_counter() - started
+    stats = user_agent.cache_stats()
+
+    raw_bytes = sum(len(ua.encode('utf-8')) for ua in workload) / len(workload)
+    parsed_bytes = sum(
+        len(json.dumps(user_agent.parse_user_agent(ua), separators=(',', ':')).encode('utf-8'))
+        for ua in corpus
+    ) / len(corpus)
+
+    print(f"User agent parsing: {args.requests} requests, {len(corpus)} corpus agents, "
+          f"{args.unique_ratio * 100:.1f}% one-off")
+    print("=" * 50)
+    print(f"Uncached parse:  {uncached / len(workload) * 1e6:.2f} µs/request")
+    print(f"Cached parse:    {cached / len(workload) * 1e6:.2f} µs/request")
+    print(f"Speedup:         {uncached / cached:.1f}x")
+    print(f"Cache hit rate:  {stats['hitRate'] * 100:.1f}% ({stats['hits']} hits, {stats['misses']} misses)")
+    print(f"Cache size:      {stats['size']}/{stats['maxSize']}")
+    print(f"Raw header:      {raw_bytes:.0f} bytes/record")
+    print(f"Parsed fields:   {parsed_bytes:.0f} bytes/record (JSON)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
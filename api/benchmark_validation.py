@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark request body validation.
+
+Compares the per-request cost of the previous hand-written validation (the
+required-fields loop, per-field strip/lower and `re.match` with pattern
+strings) against the declarative schemas in schemas.py, for valid bodies
+and for bodies with several invalid fields.
+
+Example:
+  python3 benchmark_validation.py --requests 200000
+"""
+import argparse
+import re
+import sys
+import os
+import time
+
+# Add parent directory to path to import schemas
+sys.path.insert(0, os.path.dirname(__file__))
+
+import schemas
+
+VALID_NEW_USER = {
+    'uid': 'kV1mQ2pX9sT4wZ7yB3nC6dF8gH0j',
+    'name': '  Radha Krishna ',
+    'email': ' Radha.Krishna@Example.com',
+    'phoneNumber': '+919876543210',
+    'address': '12 Temple Road, Vrindavan, UP',
+}
+INVALID_NEW_USER = dict(VALID_NEW_USER, name=' ', email='radha@example', phoneNumber='9876543210')
+VALID_LOGIN = {'uid': 'kV1mQ2pX9sT4wZ7yB3nC6dF8gH0j', 'phoneNumber': '+919876543210'}
+INVALID_LOGIN = {'uid': 'kV1mQ2pX9sT4wZ7yB3nC6dF8gH0j', 'phoneNumber': '+91 98765 43210'}
+
+
+def legacy_validate_email(email):
+    pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
+    return re.match(pattern, email) is not None
+
+
+def legacy_validate_phone(phone):
+    pattern = r'^\+\d{10,15}$'
+    return re.match(pattern, phone) is not None
+
+
+def legacy_new_user(data):
+    """Validation of create_user_with_login/register_user before schemas.py"""
+    required_fields = ['uid', 'name', 'email', 'phoneNumber', 'address']
+    for field in required_fields:
+        if not data.get(field):
+            return None, f'Missing required field: {field}'
+    uid = data['uid']
+    name = data['name'].strip()
+    email = data['email'].strip().lower()
+    phone_number = data['phoneNumber'].strip()
+    address = data['address'].strip()
+    if not legacy_validate_email(email):
+        return None, 'Invalid email format'
+    if not legacy_validate_phone(phone_number):
+        return None, 'Invalid phone number format'
+    return (uid, name, email, phone_number, address), None
+
+
+def legacy_login(data):
+    """Validation of record_login before schemas.py"""
+    uid = data.get('uid')
+    phone_number = data.get('phoneNumber')
+    if not uid or not phone_number:
+        return None, 'UID and phone number are required'
+    if not legacy_validate_phone(phone_number):
+        return None, 'Invalid phone number format'
+    return (uid, phone_number), None
+
+
+def time_per_call(func, body, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        func(body)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark request body validation')
+    parser.add_argument('--requests', type=int, default=100000, help='Number of validations per case')
+    args = parser.parse_args()
+
+    cases = [
+        ('new user, valid', legacy_new_user, schemas.NEW_USER.validate, VALID_NEW_USER),
+        ('new user, 3 bad fields', legacy_new_user, schemas.NEW_USER.validate, INVALID_NEW_USER),
+        ('login, valid', legacy_login, schemas.RECORD_LOGIN.validate, VALID_LOGIN),
+        ('login, bad phone', legacy_login, schemas.RECORD_LOGIN.validate, INVALID_LOGIN),
+    ]
+
+    print(f"Request validation: {args.requests} validations per case")
+    print("=" * 64)
+    print(f"{'Case':<24} {'Before µs':>10} {'After µs':>10} {'Speedup':>8} {'Errors':>8}")
+    for label, legacy, schema_validate, body in cases:
+        before = time_per_call(legacy, body, args.requests)
+        after = time_per_call(schema_validate, body, args.requests)
+        _, errors = schema_validate(body)
+        print(f"{label:<24} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x {len(errors):>8}")
+    print()
+    print("Before stops at the first error; after reports every field error in one pass.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
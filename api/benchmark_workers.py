@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark gunicorn worker models against the local Firestore stand-in.
+
+For each worker model (sync, gthread and, if installed, gevent), starts
+gunicorn with gunicorn.conf.py and FIRESTORE_BACKEND=local (simulated
+backend latency, deterministic seeded users in every worker), then drives
+it with closed-loop clients at increasing concurrency and reports
+throughput and latency per level.
+
+The request mix is read-heavy: profile reads, phone checks, login history
+reads and login records (two backend round trips each).
+
+The clients run in this process, so leave CPU for them: on small machines
+the client side can become the bottleneck at high concurrency.
+
+Example:
+  python3 benchmark_workers.py --latency-ms 20 --concurrency 1,8,32,64 --duration 5
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+# Add parent directory to path to import the api modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from gunicorn_settings import WORKER_MODELS, settings_from_env
+from local_firestore import synthetic_user
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(model, port, env_overrides, timeout=60):
+    env = dict(os.environ, GUNICORN_WORKER_MODEL=model, GUNICORN_BIND=f'127.0.0.1:{port}', **env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app'],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn ({model}) exited with status {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f'gunicorn ({model}) did not become ready in time')
+
+
+def next_request(rng, users):
+    """Pick a request from the read-heavy mix: (method, path, body)"""
+    user = users[rng.randrange(len(users))]
+    roll = rng.random()
+    if roll < 0.4:
+        return 'GET', f"/api/user/{user['uid']}", None
+    if roll < 0.6:
+        return 'POST', '/api/check-user', {'phoneNumber': user['phoneNumber']}
+    if roll < 0.8:
+        return 'GET', f"/api/login-history/{user['uid']}?limit=10", None
+    return 'POST', '/api/login-history', {'uid': user['uid'], 'phoneNumber': user['phoneNumber']}
+
+
+def run_level(port, users, concurrency, duration):
+    """Run `concurrency` closed-loop clients for `duration` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        own = []
+        own_errors = 0
+        while time.perf_counter() < deadline:
+            method, path, body = next_request(rng, users)
+            payload = json.dumps(body) if body is not None else None
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 500:
+                    own_errors += 1
+                else:
+                    own.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                own_errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        connection.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += own_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    if not latencies:
+        return {'throughput': 0.0, 'p50': None, 'p99': None, 'errors': errors[0]}
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'errors': errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gunicorn worker models')
+    parser.add_argument('--models', default=','.join(WORKER_MODELS), help='Comma-separated worker models')
+    parser.add_argument('--concurrency', default='1,8,32,64', help='Comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per concurrency level')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Simulated backend round trip')
+    parser.add_argument('--users', type=int, default=1000, help='Seeded users per worker')
+    args = parser.parse_args()
+
+    models = [m.strip() for m in args.models.split(',') if m.strip()]
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    users = [synthetic_user(i) for i in range(args.users)]
+    env = {
+        'FIRESTORE_BACKEND': 'local',
+        'LOCAL_FIRESTORE_LATENCY_MS': str(args.latency_ms),
+        'LOCAL_FIRESTORE_SEED_USERS': str(args.users),
+        'BACKEND_LATENCY_MS': str(args.latency_ms),
+        'LOG_LEVEL': 'WARNING',
+    }
+
+    print(f"Worker models: {args.latency_ms:g} ms simulated backend latency, "
+          f"{args.duration:g}s per level")
+    print("=" * 72)
+    print(f"{'Model':<8} {'Settings':<22} {'Clients':>7} {'Req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'Errors':>7}")
+
+    for model in models:
+        if model == 'gevent':
+            try:
+                import gevent  # noqa: F401
+            except ImportError:
+                print(f"{model:<8} skipped (gevent is not installed)")
+                continue
+        settings = settings_from_env(dict(os.environ, GUNICORN_WORKER_MODEL=model, **env))
+        summary = f"w={settings['workers']} t={settings['threads']}"
+        if model == 'gevent':
+            summary = f"w={settings['workers']} c={settings['worker_connections']}"
+
+        port = free_port()
+        process = start_server(model, port, env)
+        try:
+            for concurrency in levels:
+                result = run_level(port, users, concurrency, args.duration)
+                p50 = f"{result['p50']:8.1f}" if result['p50'] is not None else f"{'-':>8}"
+                p99 = f"{result['p99']:8.1f}" if result['p99'] is not None else f"{'-':>8}"
+                print(f"{model:<8} {summary:<22} {concurrency:>7} {result['throughput']:>9.1f} "
+                      f"{p50} {p99} {result['errors']:>7}")
+        finally:
+            process.terminate()
+            process.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
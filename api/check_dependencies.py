@@ -11,6 +11,7 @@ REQUIRED_PACKAGES = {
     'firebase_admin': 'firebase-admin',
     'dotenv': 'python-dotenv',
     'gunicorn': 'gunicorn',
+    'numpy': 'numpy',
 }
 
 def check_package(package_name, display_name):
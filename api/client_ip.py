@@ -0,0 +1,137 @@
+"""
+Client IP resolution behind trusted proxies for Prasadam Connect.
+
+The X-Forwarded-For header is only honoured when the direct peer
+(request.remote_addr) is one of the configured trusted proxies. The chain is
+then walked right-to-left, skipping trusted proxies, and the first untrusted
+address is taken as the client.
+
+Trusted proxies are configured with the TRUSTED_PROXIES environment variable
+as a comma-separated list of addresses or CIDR networks, e.g.
+"10.0.0.0/8, 130.211.0.0/22, ::1". The networks are compiled once into
+sorted, merged intervals per IP version so membership checks are a binary
+search.
+"""
+import bisect
+import ipaddress
+from functools import lru_cache
+
+UNKNOWN_IP = 'unknown'
+
+
+@lru_cache(maxsize=4096)
+def parse_ip(ip_str):
+    """
+    Parse an IP address string, caching the result.
+
+    IPv4-mapped IPv6 addresses (::ffff:a.b.c.d) are returned as IPv4 so they
+    match IPv4 proxy networks.
+
+    Args:
+        ip_str: String to parse
+
+    Returns:
+        IPv4Address | IPv6Address | None: Parsed address, or None if invalid
+    """
+    try:
+        ip = ipaddress.ip_address(ip_str.strip())
+    except (ValueError, AttributeError):
+        return None
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        return ip.ipv4_mapped
+    return ip
+
+
+class TrustedProxyIndex:
+    """
+    Sorted interval index over trusted proxy networks.
+
+    Each network is stored as an inclusive [start, end] integer range.
+    Overlapping and adjacent ranges are merged, so a lookup is a single
+    bisect over the range starts of the address' IP version.
+    """
+
+    def __init__(self, networks=()):
+        ranges = {4: [], 6: []}
+        for network in networks:
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+        self._starts = {}
+        self._ends = {}
+        for version, version_ranges in ranges.items():
+            merged = []
+            for start, end in sorted(version_ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    @classmethod
+    def from_string(cls, value):
+        """
+        Build an index from a comma-separated list of addresses/CIDR networks.
+
+        Raises:
+            ValueError: If an entry is not a valid address or network
+        """
+        networks = []
+        for entry in (value or '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            try:
+                networks.append(ipaddress.ip_network(entry, strict=False))
+            except ValueError:
+                raise ValueError(f'Invalid trusted proxy network: {entry}')
+        return cls(networks)
+
+    def __bool__(self):
+        return any(self._starts.values())
+
+    def __len__(self):
+        return sum(len(starts) for starts in self._starts.values())
+
+    def contains(self, ip):
+        """Return True if the parsed address `ip` is inside a trusted network"""
+        starts = self._starts.get(ip.version)
+        if not starts:
+            return False
+        value = int(ip)
+        i = bisect.bisect_right(starts, value) - 1
+        return i >= 0 and value <= self._ends[ip.version][i]
+
+
+def resolve_client_ip(remote_addr, forwarded_for, trusted_proxies):
+    """
+    Resolve the real client IP address.
+
+    Args:
+        remote_addr: Address of the direct peer (request.remote_addr)
+        forwarded_for: Raw X-Forwarded-For header value, or None
+        trusted_proxies: TrustedProxyIndex of proxies allowed to set the header
+
+    Returns:
+        str: The client IP address, or 'unknown' if unable to determine
+    """
+    peer = parse_ip(remote_addr) if remote_addr else None
+    if peer is None:
+        # Without a verifiable peer the forwarded chain cannot be trusted
+        return UNKNOWN_IP
+
+    if not forwarded_for or not trusted_proxies.contains(peer):
+        return str(peer)
+
+    # Walk the chain right-to-left: "client, proxy1, proxy2" (peer is the last proxy)
+    client = peer
+    for hop in reversed(forwarded_for.split(',')):
+        ip = parse_ip(hop)
+        if ip is None:
+            # A malformed entry means everything to its left is unverifiable
+            break
+        client = ip
+        if not trusted_proxies.contains(ip):
+            break
+
+    return str(client)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Compile an IP range database into the binary table used by geoip.py.
+
+Supported input formats:
+  ip2asn  Tab-separated: range_start, range_end, AS_number, country_code, AS_description
+          (e.g. the free ip2asn-combined.tsv from iptoasn.com; may be gzipped)
+  csv     Comma-separated: network (CIDR), country_code, asn
+
+Examples:
+  python3 compile_geoip.py ip2asn-combined.tsv.gz geoip.bin
+  python3 compile_geoip.py --format csv ranges.csv geoip.bin
+
+Then start the API with GEOIP_DATABASE=/path/to/geoip.bin.
+"""
+import argparse
+import csv
+import gzip
+import ipaddress
+import sys
+import os
+
+# Add parent directory to path to import geoip
+sys.path.insert(0, os.path.dirname(__file__))
+
+from geoip import compile_table
+
+
+def open_text(path):
+    """Open a plain or gzipped text file"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def read_ip2asn(f):
+    """Yield ranges from an ip2asn TSV file"""
+    for row in csv.reader(f, delimiter='\t'):
+        if len(row) < 4 or row[0].startswith('#'):
+            continue
+        start, end, asn, country = row[0], row[1], row[2], row[3]
+        if country == 'None':
+            country = ''
+        yield start, end, country, int(asn or 0)
+
+
+def read_csv(f):
+    """Yield ranges from a network,country,asn CSV file"""
+    for row in csv.reader(f):
+        if not row or row[0].startswith('#') or row[0] == 'network':
+            continue
+        network = ipaddress.ip_network(row[0].strip(), strict=False)
+        country = row[1] if len(row) > 1 else ''
+        asn = row[2].strip().upper().lstrip('AS') if len(row) > 2 else ''
+        yield network.network_address, network.broadcast_address, country, int(asn or 0)
+
+
+READERS = {
+    'ip2asn': read_ip2asn,
+    'csv': read_csv,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile an IP range database for login enrichment')
+    parser.add_argument('source', help='Input range database (.tsv, .csv, optionally .gz)')
+    parser.add_argument('output', help='Output table file')
+    parser.add_argument('--format', choices=sorted(READERS), default='ip2asn', help='Input format (default: ip2asn)')
+    args = parser.parse_args()
+
+    try:
+        with open_text(args.source) as f:
+            stats = compile_table(READERS[args.format](f), args.output)
+    except (OSError, ValueError) as e:
+        print(f"✗ Error: {str(e)}")
+        return 1
+
+    print(f"✓ Compiled {args.output}")
+    print(f"  IPv4 ranges: {stats['ipv4']}")
+    print(f"  IPv6 ranges: {stats['ipv6']}")
+    if stats['overlaps']:
+        print(f"  Dropped {stats['overlaps']} overlapping range(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Find likely duplicate user accounts for manual review.
+
+People who re-register with a new phone number usually keep their name and
+address. This job normalizes `name` and `address` for every user and finds
+candidate pairs through a blocking index instead of comparing every pair:
+
+1. Normalize: lowercase, strip accents and punctuation, drop honorifics and
+   expand common address abbreviations (rd -> road, ...).
+2. Block: each user gets keys combining a 4-character prefix of every name
+   token with a 4-character prefix of every address token (house numbers
+   included, generic words like "road" excluded), e.g. `radh|temp` or
+   `radh|12`. Only users sharing a key are compared. Prefixes tolerate
+   typos and suffix variations at the end of words; keys shared by more
+   than --max-block users are too common to be useful and are skipped.
+3. Score: Dice similarity of character bigram sets of the normalized name
+   and address (set intersections, so fast), weighted by --name-weight.
+   Pairs are scored in parallel by a multiprocessing pool.
+4. Report: pairs scoring at least --threshold, grouped into clusters of
+   connected accounts, as CSV or JSON.
+
+Examples:
+  python3 find_duplicate_users.py --firestore --output duplicates.csv
+  python3 find_duplicate_users.py --users users.jsonl --threshold 0.8 --format json
+  python3 find_duplicate_users.py --synthetic 300000 --output /tmp/duplicates.csv
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+# Add parent directory to path to import app
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Same normalization as the admin user search index
+from user_search import tokenize as normalize_text
+
+USER_FIELDS = ['uid', 'name', 'address', 'phoneNumber', 'email', 'createdAt']
+
+HONORIFICS = {'mr', 'mrs', 'ms', 'miss', 'dr', 'shri', 'sri', 'smt', 'kumari', 'prof'}
+ADDRESS_ABBREVIATIONS = {
+    'rd': 'road', 'st': 'street', 'ave': 'avenue', 'ln': 'lane', 'nagr': 'nagar', 'ngr': 'nagar',
+    'apt': 'apartment', 'apts': 'apartments', 'bldg': 'building', 'flr': 'floor', 'no': '',
+    'opp': 'opposite', 'nr': 'near', 'colny': 'colony', 'sec': 'sector', 'blk': 'block',
+}
+# Generic address words make poor blocking keys (they are still scored)
+ADDRESS_STOPWORDS = {
+    'road', 'street', 'avenue', 'lane', 'nagar', 'colony', 'sector', 'block', 'main', 'cross', 'near',
+    'opposite', 'floor', 'building', 'apartment', 'apartments', 'house', 'flat', 'the', 'of', 'and',
+}
+PREFIX_LENGTH = 4
+
+
+def normalize_name(name):
+    return [token for token in normalize_text(name) if token not in HONORIFICS]
+
+
+def normalize_address(address):
+    tokens = (ADDRESS_ABBREVIATIONS.get(token, token) for token in normalize_text(address))
+    return [token for token in tokens if token]
+
+
+def bigrams(text):
+    padded = f' {text} '
+    return frozenset(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+def dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+def blocking_keys(name_tokens, address_tokens):
+    names = {token[:PREFIX_LENGTH] for token in name_tokens if len(token) > 1}
+    addresses = {token[:PREFIX_LENGTH] for token in address_tokens if token not in ADDRESS_STOPWORDS}
+    return {f'{n}|{a}' for n in names for a in addresses}
+
+
+def build_features(users):
+    """Per-user (name bigrams, address bigrams) and the blocking index"""
+    features = []
+    blocks = defaultdict(list)
+    for index, user in enumerate(users):
+        name_tokens = normalize_name(user.get('name'))
+        address_tokens = normalize_address(user.get('address'))
+        features.append((bigrams(' '.join(name_tokens)), bigrams(' '.join(address_tokens))))
+        for key in blocking_keys(name_tokens, address_tokens):
+            blocks[key].append(index)
+    return features, blocks
+
+
+def candidate_pairs(blocks, user_count, max_block):
+    """
+    Distinct pairs of users sharing at least one block key, encoded as
+    i * user_count + j (i < j) to keep memory low.
+
+    Returns:
+        tuple: (sorted list of encoded pairs, number of skipped oversized blocks)
+    """
+    pairs = set()
+    skipped = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > max_block:
+            skipped += 1
+            continue
+        for position, i in enumerate(members):
+            base = i * user_count
+            for j in members[position + 1:]:
+                pairs.add(base + j)
+    return sorted(pairs), skipped
+
+
+# Set in each pool worker by _init_worker so features are sent once per worker
+_features = None
+_settings = None
+
+
+def _init_worker(features, settings):
+    global _features, _settings
+    _features = features
+    _settings = settings
+
+
+def score_pairs(encoded_pairs):
+    """Score a chunk of encoded pairs; returns (i, j, score, name_score, address_score) above threshold"""
+    user_count, name_weight, threshold = _settings
+    features = _features
+    matches = []
+    for encoded in encoded_pairs:
+        i, j = divmod(encoded, user_count)
+        name_a, address_a = features[i]
+        name_b, address_b = features[j]
+        name_score = dice(name_a, name_b)
+        # Skip the address comparison when the pair cannot reach the threshold
+        if name_score * name_weight + (1.0 - name_weight) < threshold:
+            continue
+        address_score = dice(address_a, address_b)
+        score = name_score * name_weight + address_score * (1.0 - name_weight)
+        if score >= threshold:
+            matches.append((i, j, score, name_score, address_score))
+    return matches
+
+
+def find_duplicates(users, threshold=0.85, name_weight=0.5, max_block=200, processes=None, chunk_size=50000):
+    """
+    Find likely duplicate pairs among `users`.
+
+    Args:
+        users: List of user dicts with at least uid, name and address
+        threshold: Minimum combined similarity (0-1) to report a pair
+        name_weight: Weight of the name similarity; the address gets the rest
+        max_block: Skip blocking keys shared by more users than this
+        processes: Scoring processes (default: CPU count; 1 scores in-process)
+        chunk_size: Pairs per scoring task
+
+    Returns:
+        tuple: (list of (i, j, score, name_score, address_score) sorted by
+            descending score, stats dict)
+    """
+    started = time.perf_counter()
+    features, blocks = build_features(users)
+    indexed = time.perf_counter()
+    pairs, skipped_blocks = candidate_pairs(blocks, len(users), max_block)
+    paired = time.perf_counter()
+
+    settings = (len(users), name_weight, threshold)
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(chunks) <= 1:
+        _init_worker(features, settings)
+        results = [score_pairs(chunk) for chunk in chunks]
+    else:
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(features, settings)) as pool:
+            results = pool.map(score_pairs, chunks)
+    matches = sorted((match for chunk in results for match in chunk), key=lambda m: -m[2])
+    scored = time.perf_counter()
+
+    stats = {
+        'users': len(users),
+        'blocks': len(blocks),
+        'skippedBlocks': skipped_blocks,
+        'candidatePairs': len(pairs),
+        'comparisonsAvoided': len(users) * (len(users) - 1) // 2 - len(pairs),
+        'matches': len(matches),
+        'processes': processes,
+        'seconds': {
+            'index': round(indexed - started, 3),
+            'pairs': round(paired - indexed, 3),
+            'score': round(scored - paired, 3),
+        },
+    }
+    return matches, stats
+
+
+def cluster(matches, user_count):
+    """Group matched users into clusters (connected components); returns index -> cluster number"""
+    parent = list(range(user_count))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, *_ in matches:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    numbers = {}
+    clusters = {}
+    for i, j, *_ in matches:
+        for index in (i, j):
+            root = find(index)
+            clusters[index] = numbers.setdefault(root, len(numbers) + 1)
+    return clusters
+
+
+def report_rows(users, matches):
+    """Review report rows, one per matched pair"""
+    clusters = cluster(matches, len(users))
+    rows = []
+    for i, j, score, name_score, address_score in matches:
+        a, b = users[i], users[j]
+        rows.append({
+            'cluster': clusters[i],
+            'score': round(score, 3),
+            'nameScore': round(name_score, 3),
+            'addressScore': round(address_score, 3),
+            'uidA': a.get('uid'), 'nameA': a.get('name'), 'addressA': a.get('address'),
+            'phoneNumberA': a.get('phoneNumber'), 'emailA': a.get('email'), 'createdAtA': a.get('createdAt'),
+            'uidB': b.get('uid'), 'nameB': b.get('name'), 'addressB': b.get('address'),
+            'phoneNumberB': b.get('phoneNumber'), 'emailB': b.get('email'), 'createdAtB': b.get('createdAt'),
+        })
+    rows.sort(key=lambda row: (row['cluster'], -row['score']))
+    return rows
+
+
+def _timestamp(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def load_firestore_users(db):
+    users = []
+    for doc in db.collection('users').select(USER_FIELDS[1:]).stream():
+        data = doc.to_dict() or {}
+        data['uid'] = doc.id
+        data['createdAt'] = _timestamp(data.get('createdAt'))
+        users.append(data)
+    return users
+
+
+def load_snapshot_users(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [
+            {field: record.get(field) for field in USER_FIELDS}
+            for record in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+def synthetic_users(count, duplicate_rate=0.02, seed=1):
+    """
+    Generate `count` users with diverse names/addresses, of which a fraction
+    are re-registrations of earlier users with a new phone number and small
+    edits (typos, abbreviations, honorifics). Re-registrations carry the
+    original's uid in `duplicateOf`.
+    """
+    rng = random.Random(seed)
+    syllables = ['ra', 'dha', 'kri', 'shna', 'go', 'pal', 'la', 'kshmi', 'ma', 'dhav', 'si', 'ta', 'vi',
+                 'shnu', 'ha', 'ri', 'an', 'ja', 'li', 'de', 'va', 'ki', 'ke', 'sha', 'mi', 'na', 'ya', 'pri']
+    streets = ['Temple Road', 'Gandhi Nagar', 'MG Road', 'Station Road', 'Lake View', 'Park Street',
+               'Main Bazaar', 'Market Lane', 'Church Street', 'Ring Road', 'Hill View', 'Nehru Colony']
+    areas = [''.join(rng.choice(syllables) for _ in range(3)).title() for _ in range(2000)]
+
+    def word(parts):
+        return ''.join(rng.choice(syllables) for _ in range(parts)).title()
+
+    def typo(text):
+        position = rng.randrange(1, len(text))
+        return text[:position] + text[position + 1:] if rng.random() < 0.5 else text[:position] + text[position - 1] + text[position:]
+
+    users = []
+    for index in range(count):
+        duplicate_of = None
+        if users and rng.random() < duplicate_rate:
+            original = rng.choice(users)
+            duplicate_of = original['uid']
+            name = original['name']
+            address = original['address']
+            edit = rng.random()
+            if edit < 0.3:
+                name = typo(name)
+            elif edit < 0.5:
+                address = address.replace('Road', 'Rd').replace('Street', 'St')
+            elif edit < 0.6:
+                name = f'Shri {name}'
+        else:
+            name = f'{word(2)} {word(rng.randint(1, 3))}'
+            address = f'{rng.randint(1, 999)} {rng.choice(streets)}, {rng.choice(areas)}'
+        users.append({
+            'uid': f'user{index:07d}',
+            'name': name,
+            'address': address,
+            'phoneNumber': f'+91{9000000000 + index}',
+            'email': f'user{index}@example.com',
+            'createdAt': None,
+            'duplicateOf': duplicate_of,
+        })
+    return users
+
+
+def write_report(rows, path, output_format):
+    if output_format == 'json':
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2, default=str)
+        return
+    fieldnames = list(rows[0]) if rows else ['cluster', 'score']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find likely duplicate user accounts')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--firestore', action='store_true', help='Read users from Firestore')
+    source.add_argument('--users', help='Users snapshot (JSON Lines with uid, name, address, ...)')
+    source.add_argument('--synthetic', type=int, help='Generate this many synthetic users (benchmarking)')
+    parser.add_argument('--threshold', type=float, default=0.85, help='Minimum similarity to report (default: 0.85)')
+    parser.add_argument('--name-weight', type=float, default=0.5, help='Weight of name vs address similarity')
+    parser.add_argument('--max-block', type=int, default=200, help='Skip blocking keys shared by more users')
+    parser.add_argument('--processes', type=int, default=None, help='Scoring processes (default: CPU count)')
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv', help='Report format')
+    parser.add_argument('--output', default='duplicate_users.csv', help='Report path')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.firestore:
+        from app import db
+        users = load_firestore_users(db)
+    elif args.users:
+        users = load_snapshot_users(args.users)
+    else:
+        users = synthetic_users(args.synthetic)
+    print(f"Loaded {len(users)} users in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    matches, stats = find_duplicates(
+        users,
+        threshold=args.threshold,
+        name_weight=args.name_weight,
+        max_block=args.max_block,
+        processes=args.processes,
+    )
+    rows = report_rows(users, matches)
+    write_report(rows, args.output, args.format)
+
+    if args.synthetic:
+        # Share of generated re-registrations paired with the account they copy
+        found = {(row['uidA'], row['uidB']) for row in rows}
+        expected = [(u['duplicateOf'], u['uid']) for u in users if u['duplicateOf']]
+        stats['recall'] = round(sum(pair in found for pair in expected) / max(len(expected), 1), 4)
+    print(json.dumps(stats, indent=2), file=sys.stderr)
+    clusters = len({row['cluster'] for row in rows})
+    print(f"✓ Wrote {len(rows)} candidate pairs in {clusters} clusters to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
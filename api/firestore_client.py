@@ -0,0 +1,157 @@
+"""
+Lazy, per-process Firestore client for Prasadam Connect.
+
+Creating the gRPC-backed Firestore client at import time slows worker boot
+and is unsafe with `gunicorn --preload`: gRPC channels do not survive fork,
+so workers would inherit the master's channel. Instead:
+
+- Firebase Admin is initialized and the client is created on first use, in
+  the process that uses it. The client is tied to the process ID, so a
+  forked worker never reuses its parent's client (firebase_admin's own
+  `firestore.client()` caches one client per app, which would).
+- `reset_client` forgets the client after a fork; it is registered with
+  `os.register_at_fork` and called from the gunicorn `post_fork` hook.
+- `warm_up` opens the channel and completes authentication with a single
+  document read, so a worker can pay that cost before accepting traffic
+  (FIRESTORE_WARMUP=1, see gunicorn.conf.py).
+
+`LazyClient` stands in for the client object itself, so modules can keep
+calling `db.collection(...)` on a module-level `db`.
+
+FIRESTORE_BACKEND=local swaps in the in-memory stand-in from
+local_firestore.py (per process), with LOCAL_FIRESTORE_LATENCY_MS simulated
+round-trip latency and LOCAL_FIRESTORE_SEED_USERS deterministic users.
+"""
+import logging
+import os
+import threading
+import time
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+logger = logging.getLogger(__name__)
+
+# Document read by warm_up; it does not need to exist
+WARMUP_COLLECTION = 'users'
+WARMUP_DOCUMENT = '_warmup'
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+
+
+def initialize_app():
+    """
+    Initialize the default Firebase Admin app (once per process).
+
+    Credentials come from GOOGLE_APPLICATION_CREDENTIALS, then
+    serviceAccountKey.json in the api directory, then Application Default
+    Credentials.
+    """
+    if not firebase_admin._apps:
+        # Try to load from environment variable or service account file
+        cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+        if cred_path and os.path.exists(cred_path):
+            cred = credentials.Certificate(cred_path)
+        else:
+            # Try to load from serviceAccountKey.json in the api directory
+            service_account_path = os.path.join(os.path.dirname(__file__), 'serviceAccountKey.json')
+            if os.path.exists(service_account_path):
+                cred = credentials.Certificate(service_account_path)
+            else:
+                # Use default credentials (for local development with gcloud auth)
+                cred = credentials.ApplicationDefault()
+
+        firebase_admin.initialize_app(cred)
+    return firebase_admin.get_app()
+
+
+def create_local_client():
+    """Create the in-memory stand-in configured by the LOCAL_FIRESTORE_* variables"""
+    import local_firestore
+
+    client = local_firestore.LocalFirestore(
+        latency_ms=float(os.getenv('LOCAL_FIRESTORE_LATENCY_MS', 0)),
+        jitter_ms=float(os.getenv('LOCAL_FIRESTORE_JITTER_MS', 0)),
+    )
+    local_firestore.seed_users(client, int(os.getenv('LOCAL_FIRESTORE_SEED_USERS', 0)))
+    return client
+
+
+def get_client():
+    """
+    Return this process' Firestore client, creating it on first use.
+
+    Raises:
+        ValueError: If FIRESTORE_BACKEND is invalid or no project ID can be
+            determined from the credentials
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _lock:
+        if _client is not None and _client_pid == pid:
+            return _client
+
+        started = time.perf_counter()
+        backend = os.getenv('FIRESTORE_BACKEND', 'firestore').strip().lower()
+        if backend == 'local':
+            _client = create_local_client()
+        elif backend == 'firestore':
+            app = initialize_app()
+            if not app.project_id:
+                raise ValueError(
+                    'Project ID is required to access Firestore. Use service account credentials '
+                    'or set the GOOGLE_CLOUD_PROJECT environment variable.'
+                )
+            _client = firestore.Client(credentials=app.credential.get_credential(), project=app.project_id)
+        else:
+            raise ValueError(f'Invalid FIRESTORE_BACKEND: {backend} (expected firestore or local)')
+        _client_pid = pid
+        logger.info("Created Firestore client in %.1f ms", (time.perf_counter() - started) * 1000)
+        return _client
+
+
+def reset_client():
+    """Forget the current client; the next use creates a new one in this process"""
+    global _client, _client_pid, _lock
+    _client = None
+    _client_pid = None
+    # The lock may have been held by another thread of the parent at fork time
+    _lock = threading.Lock()
+
+
+def warm_up():
+    """
+    Open the Firestore channel by reading one document.
+
+    Returns:
+        float: Seconds taken, including client creation
+    """
+    started = time.perf_counter()
+    get_client().collection(WARMUP_COLLECTION).document(WARMUP_DOCUMENT).get()
+    elapsed = time.perf_counter() - started
+    logger.info("Firestore warm-up took %.1f ms", elapsed * 1000)
+    return elapsed
+
+
+def warm_up_enabled():
+    """Whether FIRESTORE_WARMUP asks for a warm-up before serving traffic"""
+    return os.getenv('FIRESTORE_WARMUP', '').strip().lower() in ('1', 'true', 'yes')
+
+
+class LazyClient:
+    """Proxy for this process' Firestore client, resolved on every attribute access"""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+    def __repr__(self):
+        return f'<LazyClient pid={os.getpid()} created={_client is not None and _client_pid == os.getpid()}>'
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_client)
@@ -0,0 +1,174 @@
+"""
+Offline IP geolocation lookups for Prasadam Connect.
+
+Login records are enriched with the country and ASN of the client IP using a
+locally supplied range database; no external service is called.
+
+The database is compiled (see compile_geoip.py) into a compact binary file:
+
+    header:  magic b'PCGEOIP1' | uint32 IPv4 count | uint32 IPv6 count
+    records: start | end | country (2 ASCII bytes) | asn (uint32)
+
+All integers are big-endian and `start`/`end` are 4 bytes for IPv4 and 16
+bytes for IPv6, so the raw key bytes compare in numeric order. Records are
+sorted by `start` and non-overlapping. The file is memory-mapped read-only,
+which lets every gunicorn worker share the same page-cache pages, and a
+lookup is a binary search over the mapped records.
+"""
+import ipaddress
+import logging
+import mmap
+import os
+import struct
+
+MAGIC = b'PCGEOIP1'
+HEADER = struct.Struct('>8sII')
+KEY_WIDTHS = {4: 4, 6: 16}
+# country code + ASN following start/end keys
+PAYLOAD = struct.Struct('>2sI')
+
+logger = logging.getLogger(__name__)
+
+
+def _record_size(version):
+    return 2 * KEY_WIDTHS[version] + PAYLOAD.size
+
+
+def compile_table(ranges, path):
+    """
+    Compile IP ranges into a lookup table file.
+
+    Overlapping ranges are dropped (the first range by start address wins).
+    The file is written to a temporary path and renamed into place, so
+    processes that have the old file mapped keep a consistent view.
+
+    Args:
+        ranges: Iterable of (start_ip, end_ip, country, asn); IPs may be
+            strings or ipaddress objects, country a 2-letter code or empty
+        path: Output file path
+
+    Returns:
+        dict: Counts of written IPv4/IPv6 ranges and dropped overlaps
+    """
+    by_version = {4: [], 6: []}
+    for start, end, country, asn in ranges:
+        start = ipaddress.ip_address(start)
+        end = ipaddress.ip_address(end)
+        if start.version != end.version:
+            raise ValueError(f'Mixed IP versions in range: {start} - {end}')
+        if int(end) < int(start):
+            raise ValueError(f'Range end before start: {start} - {end}')
+        code = (country or '').strip().upper()[:2].encode('ascii').ljust(2, b'-')
+        by_version[start.version].append((int(start), int(end), code, int(asn or 0)))
+
+    stats = {'ipv4': 0, 'ipv6': 0, 'overlaps': 0}
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        counts = {}
+        for version in (4, 6):
+            width = KEY_WIDTHS[version]
+            written = 0
+            last_end = -1
+            for start, end, code, asn in sorted(by_version[version]):
+                if start <= last_end:
+                    stats['overlaps'] += 1
+                    continue
+                f.write(start.to_bytes(width, 'big'))
+                f.write(end.to_bytes(width, 'big'))
+                f.write(PAYLOAD.pack(code, asn))
+                last_end = end
+                written += 1
+            counts[version] = written
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, counts[4], counts[6]))
+    os.replace(tmp_path, path)
+
+    stats['ipv4'] = counts[4]
+    stats['ipv6'] = counts[6]
+    return stats
+
+
+class GeoIPTable:
+    """Read-only, memory-mapped view of a compiled geolocation table"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, v4_count, v6_count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f'Not a compiled geolocation table: {path}')
+
+        self._counts = {4: v4_count, 6: v6_count}
+        self._offsets = {4: HEADER.size, 6: HEADER.size + v4_count * _record_size(4)}
+
+        expected = self._offsets[6] + v6_count * _record_size(6)
+        if len(self._mm) < expected:
+            self._mm.close()
+            raise ValueError(f'Truncated geolocation table: {path}')
+
+    def __len__(self):
+        return self._counts[4] + self._counts[6]
+
+    def close(self):
+        self._mm.close()
+
+    def lookup(self, ip):
+        """
+        Look up the country and ASN of an address.
+
+        Args:
+            ip: IPv4Address/IPv6Address (e.g. from client_ip.parse_ip)
+
+        Returns:
+            dict | None: {'country': 'IN', 'asn': 55836}, or None if not found
+        """
+        version = ip.version
+        count = self._counts[version]
+        if not count:
+            return None
+
+        mm = self._mm
+        width = KEY_WIDTHS[version]
+        size = _record_size(version)
+        base = self._offsets[version]
+        key = ip.packed
+
+        # Find the last record whose start <= key
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = base + mid * size
+            if mm[offset:offset + width] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+
+        offset = base + (lo - 1) * size
+        if key > mm[offset + width:offset + 2 * width]:
+            return None
+
+        code, asn = PAYLOAD.unpack_from(mm, offset + 2 * width)
+        result = {'asn': asn or None}
+        result['country'] = None if code == b'--' else code.decode('ascii')
+        return result
+
+
+def load_table(path):
+    """
+    Load the table at `path`, or return None if no path is configured.
+
+    A missing or invalid file is reported and ignored so the API still starts
+    without enrichment.
+    """
+    if not path:
+        return None
+    try:
+        return GeoIPTable(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load geolocation table %s: %s", path, e)
+        return None
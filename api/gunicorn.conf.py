@@ -0,0 +1,89 @@
+"""
+Gunicorn configuration for the Prasadam Connect API.
+
+Gunicorn loads ./gunicorn.conf.py automatically when started from the api
+directory:
+
+  gunicorn app:app
+  GUNICORN_WORKER_MODEL=gevent BACKEND_LATENCY_MS=80 gunicorn --preload app:app
+
+Worker model, processes, threads and connections are derived from the CPU
+count and expected backend latency (see gunicorn_settings.py); command-line
+flags still take precedence.
+
+The hooks keep the Firestore client per-process (see firestore_client.py),
+which makes --preload safe, and optionally warm up the connection before a
+worker accepts traffic (FIRESTORE_WARMUP=1).
+"""
+import os
+import sys
+
+# The config is loaded before the app, so make the api modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import firestore_client
+from gunicorn_settings import request_slots, settings_from_env
+
+_settings = settings_from_env()
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+worker_class = _settings['worker_class']
+workers = _settings['workers']
+threads = _settings['threads']
+worker_connections = _settings['worker_connections']
+preload_app = os.getenv('GUNICORN_PRELOAD', '').strip().lower() in ('1', 'true', 'yes')
+
+# Requests should finish well within Firestore's own deadlines. gthread and
+# gevent workers heartbeat from outside the request, so a long-lived stream
+# (/api/admin/login-events) outlives the timeout; a sync worker only
+# heartbeats between requests and is killed mid-stream, so the app refuses
+# streams there (see when_ready)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Optionally recycle workers after this many requests to bound memory growth
+# (jitter avoids restarting all at once). Off by default: a recycled worker
+# loses its in-memory state (user search index, analytics columns, captured
+# profiles, caches) and rebuilds it from Firestore, and open streams drop.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def post_fork(server, worker):
+    # Never reuse a client (and its gRPC channel) created in the master
+    firestore_client.reset_client()
+
+
+def post_worker_init(worker):
+    if worker_class == 'gevent' and os.getenv('FIRESTORE_BACKEND', 'firestore') == 'firestore':
+        # Let gRPC cooperate with gevent's monkey-patched sockets and threads
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+
+    # Login feed streams hold a request slot each; keep some for other requests
+    login_events = getattr(worker.wsgi, 'extensions', {}).get('login_events')
+    if login_events is not None:
+        login_events.fit_to_worker(request_slots(worker.cfg.worker_class_str, worker.cfg.threads,
+                                                 worker.cfg.worker_connections))
+
+    if firestore_client.warm_up_enabled():
+        try:
+            firestore_client.warm_up()
+        except Exception:
+            # A failed warm-up must not kill the worker; the first request retries
+            worker.log.exception('Firestore warm-up failed')
+
+
+def when_ready(server):
+    server.log.info(
+        'Worker model %s: %d workers, %d threads, %d connections',
+        worker_class, workers, threads, worker_connections,
+    )
+    # Command-line flags may have changed the worker class
+    if server.cfg.worker_class_str == 'sync':
+        server.log.warning(
+            'Sync workers are killed by the %ds timeout in the middle of a stream; '
+            '/api/admin/login-events responds 503 (use GUNICORN_WORKER_MODEL=gthread or gevent)',
+            server.cfg.timeout,
+        )
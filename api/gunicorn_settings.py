@@ -0,0 +1,106 @@
+"""
+Gunicorn worker settings for the Prasadam Connect API.
+
+Requests spend most of their time waiting on Firestore, so the number of
+requests a worker process can usefully run at once is roughly
+
+    (backend latency + CPU time) / CPU time
+
+per core: while one request waits on the backend, others can use the CPU.
+`derive_settings` turns that into settings for each worker model:
+
+- sync: one request per process; 2 x CPUs + 1 processes (gunicorn's
+  default advice). Every backend wait idles a process, and long-lived
+  streams (/api/admin/login-events) are refused: the worker timeout would
+  kill the process mid-stream.
+- gthread (default): one process per CPU, each with enough threads to keep
+  its core busy while other threads wait on the backend.
+- gevent: one process per CPU with cooperative greenlets; cheap concurrency
+  for many slow or long-lived connections. Requires the gevent package.
+
+Inputs come from the environment (see gunicorn.conf.py): GUNICORN_WORKER_MODEL,
+BACKEND_LATENCY_MS (expected Firestore round trip, default 50) and
+REQUEST_CPU_MS (CPU time per request, default 5). WEB_CONCURRENCY,
+GUNICORN_THREADS and GUNICORN_WORKER_CONNECTIONS override the derived values.
+"""
+import math
+import os
+
+WORKER_MODELS = ('sync', 'gthread', 'gevent')
+DEFAULT_WORKER_MODEL = 'gthread'
+DEFAULT_BACKEND_LATENCY_MS = 50.0
+DEFAULT_REQUEST_CPU_MS = 5.0
+MAX_THREADS = 64
+MAX_WORKER_CONNECTIONS = 1000
+
+
+def cpu_count():
+    """CPUs available to this process (respects affinity/cgroup cpusets)"""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def derive_settings(model=DEFAULT_WORKER_MODEL, cpus=None, backend_latency_ms=DEFAULT_BACKEND_LATENCY_MS,
+                    request_cpu_ms=DEFAULT_REQUEST_CPU_MS):
+    """
+    Derive gunicorn settings for a worker model.
+
+    Args:
+        model: 'sync', 'gthread' or 'gevent'
+        cpus: CPUs to plan for (defaults to the CPUs available)
+        backend_latency_ms: Expected backend time per request
+        request_cpu_ms: Expected CPU time per request
+
+    Returns:
+        dict: worker_class, workers, threads and worker_connections
+
+    Raises:
+        ValueError: If the worker model is unknown
+    """
+    if model not in WORKER_MODELS:
+        raise ValueError(f"Unknown worker model: {model} (expected one of: {', '.join(WORKER_MODELS)})")
+    cpus = cpus or cpu_count()
+    # Concurrent requests that keep one core busy
+    per_core = math.ceil((backend_latency_ms + request_cpu_ms) / max(request_cpu_ms, 0.1))
+
+    settings = {'worker_class': model, 'threads': 1, 'worker_connections': 1000}
+    if model == 'sync':
+        settings['workers'] = 2 * cpus + 1
+    elif model == 'gthread':
+        settings['workers'] = cpus
+        settings['threads'] = max(2, min(per_core, MAX_THREADS))
+    else:
+        settings['workers'] = cpus
+        # Greenlets are cheap: leave headroom for bursts and long-lived streams
+        settings['worker_connections'] = max(100, min(per_core * 4, MAX_WORKER_CONNECTIONS))
+    return settings
+
+
+def request_slots(worker_class, threads, worker_connections):
+    """Requests one worker process can serve at once"""
+    if worker_class == 'gthread' or (worker_class == 'sync' and threads > 1):
+        # gunicorn runs sync workers with more than one thread as gthread
+        return threads
+    if worker_class == 'sync':
+        return 1
+    return worker_connections
+
+
+def settings_from_env(environ=None):
+    """Derive settings from the environment, applying explicit overrides"""
+    environ = os.environ if environ is None else environ
+    model = environ.get('GUNICORN_WORKER_MODEL', DEFAULT_WORKER_MODEL).strip().lower()
+    settings = derive_settings(
+        model,
+        backend_latency_ms=float(environ.get('BACKEND_LATENCY_MS', DEFAULT_BACKEND_LATENCY_MS)),
+        request_cpu_ms=float(environ.get('REQUEST_CPU_MS', DEFAULT_REQUEST_CPU_MS)),
+    )
+    if environ.get('WEB_CONCURRENCY'):
+        settings['workers'] = int(environ['WEB_CONCURRENCY'])
+    if environ.get('GUNICORN_THREADS') and model == 'gthread':
+        settings['threads'] = int(environ['GUNICORN_THREADS'])
+    if environ.get('GUNICORN_WORKER_CONNECTIONS'):
+        settings['worker_connections'] = int(environ['GUNICORN_WORKER_CONNECTIONS'])
+    return settings
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Open-loop load test for the Prasadam Connect API.
+
+Replays a configurable mix of the app's traffic against synthetic users:
+
+  check     POST /api/check-user
+  register  POST /api/create-user-with-login (a new synthetic user)
+  login     POST /api/login-history
+  profile   GET  /api/user/<uid>
+  update    PUT  /api/user/<uid> (new address)
+  history   GET  /api/login-history/<uid>?limit=10
+
+Requests arrive as a Poisson process at each rate in --rates, for --duration
+seconds per rate, independently of how fast the server answers (open loop).
+Latency is measured from each request's intended send time, so time spent
+queued behind a slow server is counted. A closed-loop test (like
+benchmark_workers.py) waits for each response before sending the next request,
+so it sends less when the server slows down and its percentiles hide that
+queueing (coordinated omission). The report shows both latency and service time
+(send to response); a growing gap between them means requests are queueing.
+
+Targets:
+  --url http://host:port   a running server. Existing users are synthetic_user(0..N-1)
+                           (local_firestore.py): start the server with
+                           FIRESTORE_BACKEND=local LOCAL_FIRESTORE_SEED_USERS=N, or
+                           pass --register-users to create them through the API first.
+  (default)                the Flask app in this process on the in-memory Firestore
+                           stand-in, with --latency-ms simulated round trips. Client and
+                           app share the interpreter, so use it to compare mixes and
+                           code changes rather than to size deployments.
+
+Example:
+  python3 load_test.py --rates 50,100,200,400 --duration 10 --mix check=30,profile=30,login=20,history=10,update=5,register=5
+  python3 load_test.py --url http://127.0.0.1:5000 --users 1000 --rates 100,200 --output results.json
+"""
+import argparse
+import bisect
+import http.client
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Add parent directory to path to import the api modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_firestore import synthetic_user
+
+OPERATIONS = ('check', 'register', 'login', 'profile', 'update', 'history')
+DEFAULT_MIX = 'check=25,login=20,profile=25,history=15,update=10,register=5'
+# First synthetic user index for registrations, far above any seeded user and
+# varied per run so repeated runs against one server do not collide
+REGISTER_INDEX_BASE = 100000
+# A rate is sustained if responses keep up with this fraction of the requests sent
+THROUGHPUT_FRACTION = 0.9
+
+
+def parse_mix(text):
+    """
+    Parse 'op=weight,...' into (operations, cumulative weights).
+
+    Raises:
+        ValueError: If an operation is unknown or no weight is positive
+    """
+    operations, cumulative, total = [], [], 0.0
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name} (expected one of: {', '.join(OPERATIONS)})")
+        weight = float(weight or 1)
+        if weight > 0:
+            total += weight
+            operations.append(name)
+            cumulative.append(total)
+    if not operations:
+        raise ValueError('The mix needs at least one operation with a positive weight')
+    return operations, [value / total for value in cumulative]
+
+
+class RequestGenerator:
+    """Draws requests from the mix; existing users are synthetic_user(0..users-1)"""
+
+    def __init__(self, mix, users, seed=None):
+        self.operations, self.cumulative = parse_mix(mix)
+        self.users = users
+        self.rng = random.Random(seed)
+        self.next_new_user = REGISTER_INDEX_BASE * self.rng.randrange(1, 9000)
+
+    def next(self):
+        """Return (operation, method, path, body)"""
+        roll = self.rng.random()
+        operation = next(
+            (op for op, bound in zip(self.operations, self.cumulative) if roll < bound),
+            self.operations[-1],
+        )
+        if operation == 'register':
+            user = synthetic_user(self.next_new_user)
+            self.next_new_user += 1
+            return operation, 'POST', '/api/create-user-with-login', user
+
+        user = synthetic_user(self.rng.randrange(self.users))
+        if operation == 'check':
+            return operation, 'POST', '/api/check-user', {'phoneNumber': user['phoneNumber']}
+        if operation == 'login':
+            return operation, 'POST', '/api/login-history', {'uid': user['uid'], 'phoneNumber': user['phoneNumber']}
+        if operation == 'profile':
+            return operation, 'GET', f"/api/user/{user['uid']}", None
+        if operation == 'update':
+            address = synthetic_user(self.rng.randrange(1 << 30))['address']
+            return operation, 'PUT', f"/api/user/{user['uid']}", {'address': address}
+        return operation, 'GET', f"/api/login-history/{user['uid']}?limit=10", None
+
+
+class HTTPTarget:
+    """A running server; each sender thread keeps its own keep-alive connection"""
+
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f'Unsupported URL: {url}')
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+
+    def session(self):
+        """Return a send(method, path, body) -> status callable for one thread"""
+        state = {'connection': None}
+
+        def send(method, path, body):
+            if state['connection'] is None:
+                state['connection'] = self.connection_class(self.host, self.port, timeout=self.timeout)
+            payload = json.dumps(body) if body is not None else None
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            try:
+                state['connection'].request(method, path, body=payload, headers=headers)
+                response = state['connection'].getresponse()
+                response.read()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                state['connection'].close()
+                state['connection'] = None
+                raise
+
+        return send
+
+
+class InProcessTarget:
+    """The Flask app in this process, on the in-memory Firestore stand-in"""
+
+    def __init__(self, users, latency_ms):
+        os.environ['FIRESTORE_BACKEND'] = 'local'
+        os.environ['LOCAL_FIRESTORE_LATENCY_MS'] = str(latency_ms)
+        os.environ['LOCAL_FIRESTORE_SEED_USERS'] = str(users)
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+        from app import app, db
+        self.app = app
+        # Create and seed the store now rather than inside the first timed request
+        db.collection('users')
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(method, path, body):
+            return client.open(path, method=method, json=body).status_code
+
+        return send
+
+
+def register_users(target, users, senders=32):
+    """Create synthetic_user(0..users-1) through the API (existing users are kept)"""
+    indexes = queue.SimpleQueue()
+    for index in range(users):
+        indexes.put(index)
+    failures = []
+
+    def sender():
+        send = target.session()
+        while True:
+            try:
+                index = indexes.get_nowait()
+            except queue.Empty:
+                return
+            status = send('POST', '/api/create-user-with-login', synthetic_user(index))
+            if status not in (201, 409):
+                failures.append(status)
+
+    threads = [threading.Thread(target=sender) for _ in range(senders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise RuntimeError(f'{len(failures)} registrations failed (first status {failures[0]})')
+
+
+def run_schedule(target, generator, rates, duration, senders, drain_timeout, seed=None):
+    """
+    Send Poisson arrivals at each rate for `duration` seconds.
+
+    Requests are queued for a pool of `senders` threads at their intended send
+    time and never delayed by slow responses; if every sender is busy they wait
+    in the queue and that wait counts toward their latency.
+
+    Returns:
+        tuple: (records, unfinished) where each record is
+            (step, operation, intended, started, finished, status) in seconds from
+            the start of the run (status is None for transport errors)
+    """
+    rng = random.Random(seed)
+    jobs = queue.SimpleQueue()
+    records = []
+    origin = time.perf_counter()
+
+    def sender():
+        send = target.session()
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            step, intended, (operation, method, path, body) = job
+            started = time.perf_counter() - origin
+            try:
+                status = send(method, path, body)
+            except Exception:
+                status = None
+            records.append((step, operation, intended, started, time.perf_counter() - origin, status))
+
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(senders)]
+    for thread in threads:
+        thread.start()
+
+    dispatched = 0
+    for step, rate in enumerate(rates):
+        step_start = step * duration
+        intended = step_start
+        while True:
+            intended += rng.expovariate(rate)
+            if intended >= step_start + duration:
+                break
+            request = generator.next()
+            delay = intended - (time.perf_counter() - origin)
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put((step, intended, request))
+            dispatched += 1
+
+    for _ in threads:
+        jobs.put(None)
+    deadline = time.perf_counter() + drain_timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.perf_counter()))
+    return list(records), dispatched - len(records)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(records, slo_ms):
+    """Latency/service-time percentiles (ms) and error counts for records"""
+    latencies = sorted((finished - intended) * 1000 for _, _, intended, _, finished, _ in records)
+    service = sorted((finished - started) * 1000 for _, _, _, started, finished, _ in records)
+    errors = sum(1 for record in records if record[5] is None or record[5] >= 500)
+    summary = {
+        'requests': len(records),
+        'errors': errors,
+        'rejected': sum(1 for record in records if record[5] is not None and 400 <= record[5] < 500),
+        'overSlo': sum(1 for value in latencies if value > slo_ms),
+    }
+    for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p999', 0.999)):
+        summary[name] = percentile(latencies, fraction)
+    summary['max'] = latencies[-1] if latencies else None
+    summary['serviceP99'] = percentile(service, 0.99)
+    return summary
+
+
+def completed_between(finished_times, start, end):
+    return bisect.bisect_left(finished_times, end) - bisect.bisect_left(finished_times, start)
+
+
+def build_report(records, unfinished, rates, duration, window, slo_ms):
+    """
+    Per-window timeline, per-step summary, per-operation summary and saturation point.
+
+    Latencies are grouped by intended send time; throughput counts responses
+    completed during the window or step, so a backlog shows up as a drop.
+    """
+    finished_times = sorted(record[4] for record in records)
+    timeline = []
+    windows = max(1, int(round(len(rates) * duration / window)))
+    buckets = [[] for _ in range(windows)]
+    for record in records:
+        buckets[min(windows - 1, int(record[2] / window))].append(record)
+    for index, bucket in enumerate(buckets):
+        entry = summarize(bucket, slo_ms)
+        entry['start'] = index * window
+        entry['throughput'] = completed_between(finished_times, index * window, (index + 1) * window) / window
+        entry['offered'] = rates[min(len(rates) - 1, int(index * window / duration))]
+        timeline.append(entry)
+
+    steps = []
+    saturation = None
+    for step, rate in enumerate(rates):
+        entry = summarize([record for record in records if record[0] == step], slo_ms)
+        entry['offered'] = rate
+        entry['throughput'] = completed_between(finished_times, step * duration, (step + 1) * duration) / duration
+        # Requests still outstanding at the end count against the last step
+        entry['unfinished'] = unfinished if step == len(rates) - 1 else 0
+        failed = entry['errors'] + entry['unfinished']
+        entry['sustained'] = (
+            entry['requests'] > 0
+            and entry['p99'] <= slo_ms
+            and entry['throughput'] >= THROUGHPUT_FRACTION * (entry['requests'] + entry['unfinished']) / duration
+            and failed <= 0.01 * (entry['requests'] + entry['unfinished'])
+        )
+        if not entry['sustained'] and saturation is None:
+            saturation = rate
+        steps.append(entry)
+
+    operations = {}
+    for operation in sorted({record[1] for record in records}):
+        selected = [record for record in records if record[1] == operation]
+        operations[operation] = summarize(selected, slo_ms)
+
+    sustained = [entry['offered'] for entry in steps if entry['sustained'] and entry['offered'] < (saturation or float('inf'))]
+    return {
+        'timeline': timeline,
+        'steps': steps,
+        'operations': operations,
+        'saturationRate': saturation,
+        'maxSustainedRate': max(sustained) if sustained else None,
+        'sloMs': slo_ms,
+    }
+
+
+def ms(value):
+    return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def print_report(report):
+    print("\nLatency from intended send time, per window (ms)")
+    print(f"{'t (s)':>6} {'Offered':>8} {'Done/s':>8} {'p50':>9} {'p99':>9} {'Max':>9} {'Svc p99':>9} {'Errors':>7}")
+    for entry in report['timeline']:
+        print(f"{entry['start']:>6g} {entry['offered']:>8g} {entry['throughput']:>8.1f} {ms(entry['p50'])} "
+              f"{ms(entry['p99'])} {ms(entry['max'])} {ms(entry['serviceP99'])} {entry['errors']:>7}")
+
+    print(f"\nPer rate (SLO: p99 <= {report['sloMs']:g} ms, errors <= 1%, "
+          f"done >= {THROUGHPUT_FRACTION:.0%} of sent)")
+    print(f"{'Offered':>8} {'Done/s':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'Svc p99':>9} "
+          f"{'Errors':>7} {'4xx':>6} {'OK':>4}")
+    for entry in report['steps']:
+        print(f"{entry['offered']:>8g} {entry['throughput']:>8.1f} {ms(entry['p50'])} {ms(entry['p90'])} "
+              f"{ms(entry['p99'])} {ms(entry['p999'])} {ms(entry['serviceP99'])} "
+              f"{entry['errors'] + entry['unfinished']:>7} {entry['rejected']:>6} {'yes' if entry['sustained'] else 'no':>4}")
+
+    print("\nPer operation (whole run)")
+    print(f"{'Operation':<10} {'Requests':>9} {'p50':>9} {'p99':>9} {'Errors':>7} {'4xx':>6}")
+    for operation, entry in report['operations'].items():
+        print(f"{operation:<10} {entry['requests']:>9} {ms(entry['p50'])} {ms(entry['p99'])} "
+              f"{entry['errors']:>7} {entry['rejected']:>6}")
+
+    print()
+    if report['saturationRate'] is None:
+        print("No saturation: every rate met the SLO; try higher --rates")
+    else:
+        sustained = report['maxSustainedRate']
+        print(f"Saturation at {report['saturationRate']:g} req/s offered"
+              + (f" (highest sustained rate: {sustained:g} req/s)" if sustained is not None else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load test with synthetic users')
+    parser.add_argument('--url', help='Base URL of a running server (default: the app in this process)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument('--rates', default='25,50,100,200', help='Comma-separated arrival rates (req/s)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per rate')
+    parser.add_argument('--users', type=int, default=1000, help='Existing synthetic users')
+    parser.add_argument('--register-users', action='store_true', help='Create the existing users through the API first')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Simulated backend round trip (in-process only)')
+    parser.add_argument('--senders', type=int, default=256, help='Sender threads (maximum requests in flight)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Request timeout in seconds (--url only)')
+    parser.add_argument('--window', type=float, default=1.0, help='Timeline window in seconds')
+    parser.add_argument('--slo-ms', type=float, default=500.0, help='p99 latency a sustained rate must meet')
+    parser.add_argument('--seed', type=int, help='Random seed for arrivals and the request mix')
+    parser.add_argument('--output', help='Also write the report as JSON to this file')
+    args = parser.parse_args()
+
+    rates = [float(rate) for rate in args.rates.split(',') if rate.strip()]
+    if not rates or min(rates) <= 0:
+        parser.error('--rates needs positive rates')
+    try:
+        generator = RequestGenerator(args.mix, args.users, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.url:
+        target = HTTPTarget(args.url.rstrip('/'), timeout=args.timeout)
+    else:
+        target = InProcessTarget(args.users, args.latency_ms)
+    if args.register_users:
+        started = time.perf_counter()
+        register_users(target, args.users)
+        print(f"Registered {args.users} users in {time.perf_counter() - started:.1f}s")
+
+    print(f"Load test: {args.url or 'in-process app'}, rates {args.rates} req/s, "
+          f"{args.duration:g}s each, mix {args.mix}")
+    records, unfinished = run_schedule(
+        target, generator, rates, args.duration, args.senders,
+        drain_timeout=args.timeout, seed=args.seed,
+    )
+    report = build_report(records, unfinished, rates, args.duration, args.window, args.slo_ms)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
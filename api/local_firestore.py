@@ -0,0 +1,520 @@
+"""
+In-memory stand-in for the Firestore client, for benchmarks and load tests.
+
+Implements the subset of the google-cloud-firestore API the API uses:
+collection/document references, get/set/update/delete, queries with
+where/order_by/limit/select/start_after, collection groups, batched writes
+and transactions (optimistic, retried by `firestore.transactional` on
+conflict). SERVER_TIMESTAMP and DELETE_FIELD are applied on write.
+
+Every simulated round trip (a document read or write, a query, a batch or
+transaction commit) sleeps for `latency_ms`, so the I/O-bound behaviour of
+the real backend is kept: the sleep releases the GIL and is cooperative
+under gevent.
+
+Data lives in the process that creates the client, so every gunicorn worker
+gets its own store. `seed_users` fills a store with the same deterministic
+users in each worker, so read workloads behave the same on every worker.
+
+Selected with FIRESTORE_BACKEND=local (see firestore_client.py).
+"""
+import itertools
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+
+from google.api_core.exceptions import Aborted, NotFound
+from google.cloud.firestore_v1 import DELETE_FIELD, SERVER_TIMESTAMP
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+DOCUMENT_ID = '__name__'
+
+_AUTO_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def _auto_id():
+    return ''.join(random.choices(_AUTO_ID_ALPHABET, k=20))
+
+
+def _resolve(data, now, existing=None):
+    """Apply write sentinels to a copy of `data`, merged over `existing`"""
+    result = dict(existing) if existing else {}
+    for key, value in data.items():
+        if value is DELETE_FIELD:
+            result.pop(key, None)
+        elif value is SERVER_TIMESTAMP:
+            result[key] = now
+        else:
+            result[key] = value
+    return result
+
+
+class _Document:
+    __slots__ = ('data', 'version', 'create_time', 'update_time')
+
+    def __init__(self, data, version, now):
+        self.data = data
+        self.version = version
+        self.create_time = now
+        self.update_time = now
+
+
+class LocalDocumentSnapshot:
+    """Read-only view of a document at the time it was read"""
+
+    def __init__(self, reference, data, create_time=None, update_time=None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        if self._data is None or field_path not in self._data:
+            raise KeyError(field_path)
+        return self._data[field_path]
+
+
+class LocalDocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self._path = path
+
+    @property
+    def id(self):
+        return self._path[-1]
+
+    @property
+    def path(self):
+        return '/'.join(self._path)
+
+    @property
+    def parent(self):
+        return LocalCollectionReference(self._client, self._path[:-1])
+
+    def collection(self, name):
+        return LocalCollectionReference(self._client, self._path + (name,))
+
+    def get(self, field_paths=None, transaction=None):
+        if transaction is not None:
+            return transaction._read(self)
+        self._client._round_trip()
+        return self._client._snapshot(self)
+
+    def set(self, data, merge=False):
+        self._client._round_trip()
+        self._client._apply([('set', self, data, merge)])
+
+    def update(self, data):
+        self._client._round_trip()
+        self._client._apply([('update', self, data, False)])
+
+    def delete(self):
+        self._client._round_trip()
+        self._client._apply([('delete', self, None, False)])
+
+    def __eq__(self, other):
+        return isinstance(other, LocalDocumentReference) and other._path == self._path
+
+    def __hash__(self):
+        return hash(self._path)
+
+
+class LocalQuery:
+    """Immutable query; each method returns a refined copy"""
+
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, client, collection_path=None, group=None, filters=(), orders=(), limit=None,
+                 fields=None, start_after=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._group = group
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._fields = fields
+        self._start_after = start_after
+
+    def _copy(self, **changes):
+        state = {
+            'collection_path': self._collection_path,
+            'group': self._group,
+            'filters': self._filters,
+            'orders': self._orders,
+            'limit': self._limit,
+            'fields': self._fields,
+            'start_after': self._start_after,
+        }
+        state.update(changes)
+        return LocalQuery(self._client, **state)
+
+    def where(self, field_path, op_string, value):
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(fields=tuple(field_paths))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start_after=document_fields_or_snapshot)
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction=transaction))
+
+    def stream(self, transaction=None):
+        self._client._round_trip()
+        return iter(self._client._run_query(self))
+
+    def on_snapshot(self, callback):
+        raise NotImplementedError('Snapshot listeners are not supported by the local Firestore stand-in')
+
+
+class LocalCollectionReference(LocalQuery):
+    def __init__(self, client, path):
+        super().__init__(client, collection_path=path)
+        self._path = path
+
+    @property
+    def id(self):
+        return self._path[-1]
+
+    def document(self, document_id=None):
+        return LocalDocumentReference(self._client, self._path + (document_id or _auto_id(),))
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+
+class LocalWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('set', reference, data, merge))
+
+    def update(self, reference, data):
+        self._writes.append(('update', reference, data, False))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None, False))
+
+    def commit(self):
+        self._client._round_trip()
+        writes, self._writes = self._writes, []
+        self._client._apply(writes)
+
+
+class LocalTransaction(LocalWriteBatch):
+    """
+    Optimistic transaction: reads record document versions and the commit
+    aborts (and is retried by `firestore.transactional`) if any changed.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, client, max_attempts=5, read_only=False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_versions = {}
+
+    @property
+    def in_progress(self):
+        return self._id is not None
+
+    def _begin(self, retry_id=None):
+        self._id = next(self._ids)
+
+    def _clean_up(self):
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _read(self, reference):
+        self._client._round_trip()
+        snapshot, version = self._client._snapshot(reference, with_version=True)
+        self._read_versions.setdefault(reference._path, version)
+        return snapshot
+
+    def _commit(self):
+        self._client._round_trip()
+        try:
+            self._client._apply(self._writes, expected_versions=self._read_versions)
+        finally:
+            self._clean_up()
+        return []
+
+
+class LocalFirestore:
+    """
+    In-memory Firestore client.
+
+    Args:
+        latency_ms: Simulated round-trip latency per backend call
+        jitter_ms: Uniform random extra latency (0 to jitter_ms) per call
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self._collections = {}
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+        self.round_trips = 0
+
+    def __repr__(self):
+        return f'<LocalFirestore collections={len(self._collections)} latency={self.latency * 1000:.1f}ms>'
+
+    # Public client API
+
+    def collection(self, name):
+        return LocalCollectionReference(self, (name,))
+
+    def collection_group(self, collection_id):
+        return LocalQuery(self, group=collection_id)
+
+    def document(self, path):
+        return LocalDocumentReference(self, tuple(path.split('/')))
+
+    def batch(self):
+        return LocalWriteBatch(self)
+
+    def transaction(self, max_attempts=5, read_only=False):
+        return LocalTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def close(self):
+        pass
+
+    # Storage
+
+    def _round_trip(self):
+        self.round_trips += 1
+        delay = self.latency + (random.random() * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _snapshot(self, reference, with_version=False):
+        with self._lock:
+            doc = self._collections.get(reference._path[:-1], {}).get(reference._path[-1])
+            if doc is None:
+                snapshot, version = LocalDocumentSnapshot(reference, None), None
+            else:
+                snapshot = LocalDocumentSnapshot(reference, dict(doc.data), doc.create_time, doc.update_time)
+                version = doc.version
+        return (snapshot, version) if with_version else snapshot
+
+    def _apply(self, writes, expected_versions=None):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if expected_versions:
+                for path, version in expected_versions.items():
+                    doc = self._collections.get(path[:-1], {}).get(path[-1])
+                    if (doc.version if doc is not None else None) != version:
+                        raise Aborted('Transaction conflict: a document read in the transaction changed')
+
+            for kind, reference, data, merge in writes:
+                path = reference._path
+                collection = self._collections.setdefault(path[:-1], {})
+                doc = collection.get(path[-1])
+                if kind == 'delete':
+                    collection.pop(path[-1], None)
+                    continue
+                if kind == 'update' and doc is None:
+                    raise NotFound(f'No document to update: {reference.path}')
+                base = doc.data if doc is not None and (merge or kind == 'update') else None
+                resolved = _resolve(data, now, base)
+                if doc is None:
+                    collection[path[-1]] = _Document(resolved, next(self._versions), now)
+                else:
+                    doc.data = resolved
+                    doc.version = next(self._versions)
+                    doc.update_time = now
+
+    def _run_query(self, query):
+        with self._lock:
+            if query._group is not None:
+                candidates = [
+                    (path, doc_id, doc)
+                    for path, docs in self._collections.items() if path[-1] == query._group
+                    for doc_id, doc in docs.items()
+                ]
+            else:
+                docs = self._collections.get(query._collection_path, {})
+                candidates = [(query._collection_path, doc_id, doc) for doc_id, doc in docs.items()]
+            rows = [
+                (path + (doc_id,), dict(doc.data), doc.create_time, doc.update_time)
+                for path, doc_id, doc in candidates
+                if all(_matches(doc.data, doc_id, f) for f in query._filters)
+            ]
+
+        # Firestore orders by the filtered/ordered fields, then by document path
+        orders = list(query._orders) or [(DOCUMENT_ID, ASCENDING)]
+        rows.sort(key=lambda row: row[0])
+        for field_path, direction in reversed(orders):
+            rows.sort(
+                key=lambda row, f=field_path: _sort_key(row[0][-1] if f == DOCUMENT_ID else row[1].get(f)),
+                reverse=direction == DESCENDING,
+            )
+            # Documents missing an ordered field are excluded, as in Firestore
+            if field_path != DOCUMENT_ID:
+                rows = [row for row in rows if field_path in row[1]]
+
+        if query._start_after is not None:
+            rows = _after_cursor(rows, orders, query._start_after)
+        if query._limit is not None:
+            rows = rows[:query._limit]
+
+        snapshots = []
+        for path, data, create_time, update_time in rows:
+            if query._fields is not None:
+                data = {field: data[field] for field in query._fields if field in data}
+            snapshots.append(LocalDocumentSnapshot(LocalDocumentReference(self, path), data, create_time, update_time))
+        return snapshots
+
+
+def _sort_key(value):
+    # Firestore's cross-type ordering, simplified: null < numbers < timestamps < strings < others
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, int(value))
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    return (5, repr(value))
+
+
+def _matches(data, doc_id, condition):
+    field_path, op, expected = condition
+    if field_path == DOCUMENT_ID:
+        value = doc_id
+        expected = expected.id if isinstance(expected, LocalDocumentReference) else expected
+    elif field_path not in data:
+        return False
+    else:
+        value = data[field_path]
+
+    if op == '==':
+        return value == expected
+    if op == '!=':
+        return value != expected
+    if op == 'in':
+        return value in expected
+    if op == 'not-in':
+        return value not in expected
+    if op == 'array-contains':
+        return isinstance(value, list) and expected in value
+    if op == 'array-contains-any':
+        return isinstance(value, list) and any(item in value for item in expected)
+
+    left, right = _sort_key(value), _sort_key(expected)
+    if left[0] != right[0]:
+        return False
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '>':
+        return left > right
+    if op == '>=':
+        return left >= right
+    raise ValueError(f'Unsupported operator: {op}')
+
+
+def _after_cursor(rows, orders, cursor):
+    if isinstance(cursor, LocalDocumentSnapshot):
+        values = [cursor.id if f == DOCUMENT_ID else cursor._data.get(f) for f, _ in orders]
+        cursor_path = cursor.reference._path
+    else:
+        values = [cursor.get(f) for f, _ in orders]
+        cursor_path = None
+
+    def is_after(row):
+        for (field_path, direction), value in zip(orders, values):
+            own = row[0][-1] if field_path == DOCUMENT_ID else row[1].get(field_path)
+            a, b = _sort_key(own), _sort_key(value)
+            if a != b:
+                return (a > b) if direction == ASCENDING else (a < b)
+        return cursor_path is not None and row[0] > cursor_path
+
+    return [row for row in rows if is_after(row)]
+
+
+FIRST_NAMES = ['Radha', 'Krishna', 'Gopal', 'Lakshmi', 'Madhav', 'Sita', 'Rama', 'Govind', 'Tulasi', 'Hari',
+               'Ananya', 'Arjun', 'Devaki', 'Keshav', 'Meera', 'Narayan', 'Priya', 'Shyam', 'Uma', 'Vishnu']
+LAST_NAMES = ['Sharma', 'Iyer', 'Das', 'Patel', 'Reddy', 'Nair', 'Gupta', 'Rao', 'Menon', 'Joshi']
+STREETS = ['Temple Road', 'Gandhi Nagar', 'MG Road', 'Station Road', 'Lake View', 'Park Street', 'Main Bazaar']
+CITIES = ['Vrindavan', 'Mayapur', 'Bengaluru', 'Pune', 'Chennai', 'Mumbai', 'Kolkata', 'Hyderabad']
+
+
+def synthetic_user(index):
+    """Deterministic user profile number `index` (uid, name, email, phone, address)"""
+    rng = random.Random(index)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        'uid': f'user{index:07d}',
+        'name': f'{first} {last}',
+        'email': f'{first.lower()}.{last.lower()}.{index}@example.com',
+        'phoneNumber': f'+91{9000000000 + index}',
+        'address': f'{rng.randint(1, 400)} {rng.choice(STREETS)}, {rng.choice(CITIES)}',
+    }
+
+
+def seed_users(client, count):
+    """
+    Write `count` deterministic users (and their phone/email marker documents)
+    without simulated latency.
+
+    Returns:
+        list: The seeded user profiles
+    """
+    latency, jitter = client.latency, client.jitter
+    client.latency = client.jitter = 0.0
+    try:
+        users = [synthetic_user(i) for i in range(count)]
+        batch = client.batch()
+        for user in users:
+            user_data = dict(user, createdAt=SERVER_TIMESTAMP, updatedAt=SERVER_TIMESTAMP)
+            batch.set(client.collection('users').document(user['uid']), user_data)
+            batch.set(
+                client.collection('users_by_phone').document(user['phoneNumber'].replace('+', '_plus_')),
+                {'uid': user['uid'], 'phoneNumber': user['phoneNumber'], 'createdAt': SERVER_TIMESTAMP},
+            )
+            batch.set(
+                client.collection('users_by_email').document(
+                    user['email'].replace('@', '_at_').replace('.', '_dot_')),
+                {'uid': user['uid'], 'email': user['email'], 'createdAt': SERVER_TIMESTAMP},
+            )
+        batch.commit()
+        return users
+    finally:
+        client.latency, client.jitter = latency, jitter
@@ -0,0 +1,199 @@
+"""
+Real-time login activity feed for Prasadam Connect.
+
+Login events are fanned out to Server-Sent Events subscribers through
+per-client bounded queues. A subscriber whose queue fills up (a slow
+consumer) is dropped instead of blocking publishers or growing memory.
+
+Events come from one of two sources, selected with LOGIN_EVENTS_SOURCE:
+
+- process (default): published by the request handlers of this process
+  right after a login record is written. Cheap, but each gunicorn worker
+  only sees its own logins.
+- firestore: one shared snapshot listener per process on the newest records
+  of the login history layout, started when the first subscriber connects.
+  Every worker sees every login, for the cost of one watch per worker.
+"""
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+# Fields of a login record that are sent to subscribers
+EVENT_FIELDS = ['uid', 'phoneNumber', 'timestamp', 'browserFamily', 'osFamily', 'deviceFamily', 'country']
+
+
+def login_event(doc_id, data):
+    """Build a feed event from a login record"""
+    event = {'id': doc_id}
+    for field in EVENT_FIELDS:
+        if field in data:
+            event[field] = data[field]
+    timestamp = event.get('timestamp')
+    if hasattr(timestamp, 'timestamp'):
+        event['timestamp'] = timestamp.timestamp()
+    elif not isinstance(timestamp, (int, float)):
+        # Server timestamp sentinel of a record written by this process
+        event['timestamp'] = time.time()
+    return event
+
+
+class Subscription:
+    """A single subscriber with a bounded queue and an optional uid filter"""
+
+    def __init__(self, uids=None, max_queue=100):
+        self.uids = frozenset(uids) if uids else None
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def matches(self, event):
+        return self.uids is None or event.get('uid') in self.uids
+
+    def offer(self, event):
+        """Queue an event without blocking; returns False if the queue is full"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        """Wait up to `timeout` seconds for the next event; None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LoginEventBroker:
+    """
+    Fans login events out to subscribers.
+
+    Args:
+        max_subscribers: Maximum concurrent subscribers
+        max_queue: Per-subscriber queue size before it is dropped
+        listener_window: Newest records watched by the Firestore listener;
+            more logins than this between two snapshots are not all published
+        reserved_slots: Request slots of a worker kept free for normal
+            requests (see `fit_to_worker`)
+    """
+
+    def __init__(self, max_subscribers=4, max_queue=100, listener_window=500, reserved_slots=8):
+        self.max_subscribers = max_subscribers
+        self.reserved_slots = reserved_slots
+        self.max_queue = max_queue
+        self.listener_window = listener_window
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+        self._listener_starting = False
+        self.stats = {'published': 0, 'delivered': 0, 'dropped_subscribers': 0}
+
+    def subscribe(self, uids=None):
+        """
+        Register a subscriber.
+
+        Returns:
+            Subscription | None: The subscription, or None if the broker is full
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(uids, self.max_queue)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def fit_to_worker(self, slots):
+        """
+        Lower the subscriber cap to what a worker serving `slots` concurrent
+        requests can spare: each stream occupies a slot for as long as the
+        client stays connected, and `reserved_slots` must stay free.
+        """
+        self.max_subscribers = max(0, min(self.max_subscribers, slots - self.reserved_slots))
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event):
+        """Deliver an event to all matching subscribers, dropping slow ones"""
+        # Offers never block, so the whole fan-out can run under the lock
+        with self._lock:
+            self.stats['published'] += 1
+            for subscription in list(self._subscribers):
+                if not subscription.matches(event):
+                    continue
+                if subscription.offer(event):
+                    self.stats['delivered'] += 1
+                else:
+                    subscription.dropped = True
+                    self._subscribers.discard(subscription)
+                    self.stats['dropped_subscribers'] += 1
+
+    def start_listener(self, db, layout):
+        """
+        Start the shared Firestore listener on the login history layout (once
+        per process). Only logins recorded after the listener starts are
+        published.
+
+        The listener watches the newest `listener_window` records, so its
+        memory stays bounded as the feed runs. If the watch cannot be opened
+        the error is raised and the next call tries again.
+        """
+        with self._lock:
+            if self._listener is not None or self._listener_starting:
+                return
+            self._listener_starting = True
+
+        started_at = time.time()
+        # A record re-enters the window when a newer one is deleted; remember
+        # recently published IDs so it is not published twice
+        published = OrderedDict()
+
+        def on_snapshot(docs, changes, read_time):
+            for change in changes:
+                if change.type.name != 'ADDED' or change.document.id in published:
+                    continue
+                event = login_event(change.document.id, change.document.to_dict() or {})
+                if event['timestamp'] < started_at:
+                    continue
+                published[event['id']] = None
+                if len(published) > self.listener_window * 2:
+                    published.popitem(last=False)
+                self.publish(event)
+
+        try:
+            watch = layout.live_query(db, self.listener_window).on_snapshot(on_snapshot)
+        except Exception:
+            with self._lock:
+                self._listener_starting = False
+            raise
+
+        with self._lock:
+            self._listener = watch
+            self._listener_starting = False
+
+    def stream(self, subscription, keepalive_seconds=15):
+        """
+        Yield Server-Sent Events for a subscription until the client goes
+        away or the subscription is dropped as a slow consumer.
+        """
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                event = subscription.get(keepalive_seconds)
+                if subscription.dropped:
+                    yield 'event: dropped\ndata: {"reason": "slow consumer"}\n\n'
+                    return
+                if event is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"id: {event['id']}\nevent: login\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,291 @@
+"""
+Login history storage layouts for Prasadam Connect.
+
+The original layout writes every login event into the top-level `loginHistory`
+collection with an auto-generated ID and a monotonically increasing
+`timestamp`. Under bursty login traffic the index entries for that timestamp
+all land on the same key range, which is a sequential-write hotspot.
+
+The layouts below can be selected with the LOGIN_HISTORY_LAYOUT environment
+variable:
+
+- flat (default): `loginHistory/{autoId}` - the original layout
+- per_user: `loginHistoryByUser/{uid}/logins/{autoId}` - index entries are
+  prefixed by the parent path, so writes spread across users. Records also
+  get a random `shard` bucket: time-range scans across all users go through
+  a collection-group (shard, timestamp) index instead of one global
+  timestamp index, which would bring the hotspot back
+- sharded: `loginHistory/{autoId}` with a random `shard` field; time-range
+  scans go through the composite (shard, timestamp) index, so the
+  single-field `timestamp` index can be exempted (see DATABASE_SCHEMA.md)
+"""
+import os
+import random
+from firebase_admin import firestore
+
+LOGIN_HISTORY_COLLECTION = 'loginHistory'
+PER_USER_PARENT_COLLECTION = 'loginHistoryByUser'
+PER_USER_SUBCOLLECTION = 'logins'
+DEFAULT_SHARD_COUNT = 16
+# Firestore allows at most this many values in an `in` filter
+MAX_IN_VALUES = 30
+
+
+class LoginHistoryLayout:
+    """
+    Base class for login history layouts.
+
+    Subclasses decide where a login record lives and how a user's history is
+    queried. Records are written through `write`, which accepts an optional
+    transaction so the same code path serves both plain and transactional
+    writes.
+    """
+    name = None
+
+    def new_ref(self, db, uid):
+        """Return a new document reference for a login record of `uid`"""
+        raise NotImplementedError
+
+    def ref_for(self, db, uid, doc_id):
+        """Return the document reference for an existing record ID (used by migrations)"""
+        raise NotImplementedError
+
+    def query(self, db, uid, limit):
+        """Return a query for the latest `limit` login records of `uid`"""
+        raise NotImplementedError
+
+    def iter_all(self, db):
+        """Yield every login record snapshot stored in this layout"""
+        raise NotImplementedError
+
+    def iter_since(self, db, since=None, fields=None):
+        """
+        Yield login record snapshots with `timestamp` >= `since`, oldest first
+        (oldest first within each shard for the sharded layout).
+
+        Args:
+            db: Firestore client
+            since: datetime lower bound (inclusive), or None for all records
+            fields: Optional list of field paths to fetch (projection)
+        """
+        raise NotImplementedError
+
+    def live_query(self, db, limit):
+        """
+        Return a single query over the newest `limit` records of every user,
+        for a snapshot listener. The window moves forward as records are
+        written, so the listener never holds more than `limit` documents.
+        """
+        raise NotImplementedError
+
+    def _newest(self, query, limit):
+        return query.order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
+
+    def _all_shards(self, query):
+        if self.shard_count > MAX_IN_VALUES:
+            raise ValueError(
+                f'The login feed listener supports at most {MAX_IN_VALUES} shards '
+                f'(LOGIN_HISTORY_SHARDS is {self.shard_count})'
+            )
+        return query.where('shard', 'in', list(range(self.shard_count)))
+
+    def _shard_ordered(self, query, since, fields):
+        # Scan each shard through the (shard, timestamp) composite index.
+        # Records are ordered within a shard only.
+        for shard in range(self.shard_count):
+            yield from self._time_ordered(query.where('shard', '==', shard), since, fields)
+
+    def _time_ordered(self, query, since, fields):
+        if since is not None:
+            query = query.where('timestamp', '>=', since)
+        query = query.order_by('timestamp')
+        if fields:
+            query = query.select(fields)
+        return query.stream()
+
+    def build_record(self, uid, phone_number, user_agent, ip_address):
+        """
+        Build the login record document.
+
+        Args:
+            uid: Firebase Auth UID of the user who logged in
+            phone_number: Phone number used for login (E.164 format)
+            user_agent: User agent string from the request
+            ip_address: Client IP address, or 'unknown'
+
+        Returns:
+            dict: Document data ready to be written
+        """
+        return {
+            'uid': uid,
+            'phoneNumber': phone_number,
+            'timestamp': firestore.SERVER_TIMESTAMP,
+            'userAgent': user_agent,
+            'ipAddress': ip_address,
+        }
+
+    def prepare(self, data):
+        """Add any layout-specific fields to a record before it is written"""
+        return data
+
+    def write(self, db, uid, data, transaction=None):
+        """
+        Write a login record for `uid`.
+
+        Args:
+            db: Firestore client
+            uid: Firebase Auth UID the record belongs to
+            data: Record built by `build_record`
+            transaction: Optional Firestore transaction to write through
+
+        Returns:
+            DocumentReference: Reference of the written record
+        """
+        ref = self.new_ref(db, uid)
+        data = self.prepare(dict(data))
+        if transaction is not None:
+            transaction.set(ref, data)
+        else:
+            ref.set(data)
+        return ref
+
+
+class FlatLoginHistoryLayout(LoginHistoryLayout):
+    """Single top-level `loginHistory` collection (original layout)"""
+    name = 'flat'
+
+    def new_ref(self, db, uid):
+        return db.collection(LOGIN_HISTORY_COLLECTION).document()
+
+    def ref_for(self, db, uid, doc_id):
+        return db.collection(LOGIN_HISTORY_COLLECTION).document(doc_id)
+
+    def query(self, db, uid, limit):
+        return db.collection(LOGIN_HISTORY_COLLECTION)\
+                 .where('uid', '==', uid)\
+                 .order_by('timestamp', direction=firestore.Query.DESCENDING)\
+                 .limit(limit)
+
+    def iter_all(self, db):
+        return db.collection(LOGIN_HISTORY_COLLECTION).stream()
+
+    def iter_since(self, db, since=None, fields=None):
+        return self._time_ordered(db.collection(LOGIN_HISTORY_COLLECTION), since, fields)
+
+    def live_query(self, db, limit):
+        # Needs the single-field timestamp index (not exempted for this layout)
+        return self._newest(db.collection(LOGIN_HISTORY_COLLECTION), limit)
+
+
+class PerUserLoginHistoryLayout(LoginHistoryLayout):
+    """
+    Per-user subcollections under `loginHistoryByUser/{uid}/logins`.
+
+    Each record gets a random `shard` in [0, shard_count) so that scans over
+    every user's records use `shard_count` index ranges rather than one.
+    """
+    name = 'per_user'
+
+    def __init__(self, shard_count=DEFAULT_SHARD_COUNT):
+        if shard_count < 1:
+            raise ValueError('Shard count must be at least 1')
+        self.shard_count = shard_count
+
+    def prepare(self, data):
+        data['shard'] = random.randrange(self.shard_count)
+        return data
+
+    def _collection(self, db, uid):
+        return db.collection(PER_USER_PARENT_COLLECTION)\
+                 .document(uid)\
+                 .collection(PER_USER_SUBCOLLECTION)
+
+    def new_ref(self, db, uid):
+        return self._collection(db, uid).document()
+
+    def ref_for(self, db, uid, doc_id):
+        return self._collection(db, uid).document(doc_id)
+
+    def query(self, db, uid, limit):
+        # No uid filter needed: the subcollection already scopes the query
+        return self._collection(db, uid)\
+                   .order_by('timestamp', direction=firestore.Query.DESCENDING)\
+                   .limit(limit)
+
+    def iter_all(self, db):
+        return db.collection_group(PER_USER_SUBCOLLECTION).stream()
+
+    def iter_since(self, db, since=None, fields=None):
+        # Uses the collection-group (shard, timestamp) index (see firestore.indexes.json);
+        # records written before shards were added need migrating to get a shard
+        return self._shard_ordered(db.collection_group(PER_USER_SUBCOLLECTION), since, fields)
+
+    def live_query(self, db, limit):
+        # Uses the collection-group (shard, timestamp descending) index
+        return self._newest(self._all_shards(db.collection_group(PER_USER_SUBCOLLECTION)), limit)
+
+
+class ShardedLoginHistoryLayout(FlatLoginHistoryLayout):
+    """
+    Top-level `loginHistory` collection with a random `shard` field.
+
+    Each write picks a shard uniformly at random so that time-ordered index
+    entries are spread over `shard_count` key ranges. Per-user reads keep
+    using the (uid, timestamp) composite index.
+    """
+    name = 'sharded'
+
+    def __init__(self, shard_count=DEFAULT_SHARD_COUNT):
+        if shard_count < 1:
+            raise ValueError('Shard count must be at least 1')
+        self.shard_count = shard_count
+
+    def prepare(self, data):
+        data['shard'] = random.randrange(self.shard_count)
+        return data
+
+    def iter_since(self, db, since=None, fields=None):
+        # The single-field timestamp index may be exempted for this layout
+        return self._shard_ordered(db.collection(LOGIN_HISTORY_COLLECTION), since, fields)
+
+    def live_query(self, db, limit):
+        # Uses the (shard, timestamp descending) composite index
+        return self._newest(self._all_shards(db.collection(LOGIN_HISTORY_COLLECTION)), limit)
+
+
+LAYOUTS = {
+    FlatLoginHistoryLayout.name: FlatLoginHistoryLayout,
+    PerUserLoginHistoryLayout.name: PerUserLoginHistoryLayout,
+    ShardedLoginHistoryLayout.name: ShardedLoginHistoryLayout,
+}
+
+
+def get_layout(name=None, shard_count=None):
+    """
+    Create a login history layout.
+
+    Args:
+        name: Layout name ('flat', 'per_user' or 'sharded'). Defaults to the
+            LOGIN_HISTORY_LAYOUT environment variable, then 'flat'.
+        shard_count: Number of shards for the sharded and per_user layouts.
+            Defaults to the LOGIN_HISTORY_SHARDS environment variable, then 16.
+
+    Returns:
+        LoginHistoryLayout: The selected layout
+
+    Raises:
+        ValueError: If the layout name is unknown
+    """
+    if name is None:
+        name = os.getenv('LOGIN_HISTORY_LAYOUT', FlatLoginHistoryLayout.name)
+    name = name.strip().lower()
+
+    if name not in LAYOUTS:
+        raise ValueError(f"Unknown login history layout: {name} (expected one of: {', '.join(LAYOUTS)})")
+
+    if name in (ShardedLoginHistoryLayout.name, PerUserLoginHistoryLayout.name):
+        if shard_count is None:
+            shard_count = int(os.getenv('LOGIN_HISTORY_SHARDS', DEFAULT_SHARD_COUNT))
+        return LAYOUTS[name](shard_count)
+
+    return LAYOUTS[name]()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Offline login analytics report.
+
+Computes daily active users, logins per hour and new registrations per day
+from an exported snapshot (JSON Lines) or directly from Firestore, and
+writes the report as JSON or as CSV files.
+
+Examples:
+  python3 login_report.py --logins loginHistory.jsonl --users users.jsonl --days 30
+  python3 login_report.py --firestore --days 7 --utc-offset-minutes 330 --format csv --output reports/
+"""
+import argparse
+import csv
+import json
+import sys
+import os
+
+# Add parent directory to path to import analytics
+sys.path.insert(0, os.path.dirname(__file__))
+
+from analytics import LoginAnalytics
+
+
+def write_csv(report, output_dir):
+    """Write one CSV file per series into `output_dir`"""
+    os.makedirs(output_dir, exist_ok=True)
+    series = {
+        'daily_active_users.csv': ('date', report['dailyActiveUsers']),
+        'logins_per_hour.csv': ('hour', report['loginsPerHour']),
+        'registrations_per_day.csv': ('date', report['registrationsPerDay']),
+    }
+    for filename, (label, rows) in series.items():
+        with open(os.path.join(output_dir, filename), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([label, 'count'])
+            for row in rows:
+                writer.writerow([row[label], row['count']])
+        print(f"✓ Wrote {os.path.join(output_dir, filename)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute login analytics from a snapshot or Firestore')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--logins', help='Login history snapshot (JSON Lines with uid, timestamp)')
+    source.add_argument('--firestore', action='store_true', help='Read directly from Firestore')
+    parser.add_argument('--users', help='Users snapshot (JSON Lines with uid, createdAt)')
+    parser.add_argument('--days', type=int, default=30, help='Report window in days (default: 30)')
+    parser.add_argument('--utc-offset-minutes', type=int,
+                        default=int(os.getenv('ANALYTICS_UTC_OFFSET_MINUTES', 0)),
+                        help='Local time offset for day/hour buckets (e.g. 330 for IST)')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json', help='Output format')
+    parser.add_argument('--output', help='Output file (json) or directory (csv); default: stdout / ./report')
+    args = parser.parse_args()
+
+    if args.firestore:
+        from app import db, login_history_layout
+        analytics = LoginAnalytics(login_history_layout, args.utc_offset_minutes)
+        count = analytics.refresh(db)
+    else:
+        analytics = LoginAnalytics(utc_offset_minutes=args.utc_offset_minutes)
+        count = analytics.load_snapshot(args.logins, args.users)
+    print(f"Loaded {count} events", file=sys.stderr)
+
+    report = analytics.report(args.days)
+
+    if args.format == 'csv':
+        write_csv(report, args.output or 'report')
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Wrote {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
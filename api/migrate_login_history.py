@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Migrate login history records between storage layouts.
+
+Copies every record from the source layout into the target layout, keeping
+document IDs and field values. Writes go through batched writes so large
+collections are migrated in a bounded number of commits.
+
+Examples:
+  python3 migrate_login_history.py --from flat --to per_user --dry-run
+  python3 migrate_login_history.py --from flat --to sharded --shards 32
+  python3 migrate_login_history.py --from per_user --to flat --delete-source
+  python3 migrate_login_history.py --from per_user --to per_user  # assign missing shards
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path to import app
+sys.path.insert(0, os.path.dirname(__file__))
+
+from login_history import get_layout, LAYOUTS
+
+# Firestore allows at most 500 operations per batched write
+MAX_BATCH_OPERATIONS = 500
+
+
+def migrate(db, source, target, batch_size=MAX_BATCH_OPERATIONS, dry_run=False, delete_source=False):
+    """
+    Copy all records from `source` layout into `target` layout.
+
+    Args:
+        db: Firestore client
+        source: LoginHistoryLayout to read from
+        target: LoginHistoryLayout to write to
+        batch_size: Maximum number of operations per batched write
+        dry_run: Only count records, do not write anything
+        delete_source: Delete each source record once it is copied
+
+    Returns:
+        dict: Counters for copied, skipped and deleted records
+    """
+    stats = {'copied': 0, 'skipped': 0, 'deleted': 0}
+    batch = None
+    operations = 0
+
+    for doc in source.iter_all(db):
+        data = doc.to_dict() or {}
+        uid = data.get('uid')
+        if not uid:
+            # Records without a uid cannot be placed in a per-user layout
+            stats['skipped'] += 1
+            continue
+
+        target_ref = target.ref_for(db, uid, doc.id)
+        same_path = target_ref.path == doc.reference.path
+        needed = 1 if (same_path or not delete_source) else 2
+
+        if dry_run:
+            stats['copied'] += 1
+            continue
+
+        if batch is None or operations + needed > batch_size:
+            if batch is not None:
+                batch.commit()
+            batch = db.batch()
+            operations = 0
+
+        # Drop the previous shard assignment; sharded layouts assign a new one
+        data.pop('shard', None)
+        batch.set(target_ref, target.prepare(data))
+        operations += 1
+        stats['copied'] += 1
+
+        if delete_source and not same_path:
+            batch.delete(doc.reference)
+            operations += 1
+            stats['deleted'] += 1
+
+    if batch is not None and operations:
+        batch.commit()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate login history between storage layouts')
+    parser.add_argument('--from', dest='source', required=True, choices=sorted(LAYOUTS),
+                        help='Layout the records are currently stored in')
+    parser.add_argument('--to', dest='target', required=True, choices=sorted(LAYOUTS),
+                        help='Layout to copy the records into')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='Shard count for the sharded and per_user layouts (default: LOGIN_HISTORY_SHARDS or 16)')
+    parser.add_argument('--batch-size', type=int, default=MAX_BATCH_OPERATIONS,
+                        help='Operations per batched write (max 500)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Count records without writing anything')
+    parser.add_argument('--delete-source', action='store_true',
+                        help='Delete source records after copying them')
+    args = parser.parse_args()
+
+    if args.source == args.target == 'flat':
+        print('Source and target layouts are the same, nothing to do')
+        return 0
+
+    if not 1 <= args.batch_size <= MAX_BATCH_OPERATIONS:
+        print(f'Batch size must be between 1 and {MAX_BATCH_OPERATIONS}')
+        return 1
+
+    from app import db
+
+    source = get_layout(args.source, args.shards)
+    target = get_layout(args.target, args.shards)
+
+    print(f"Migrating login history: {source.name} -> {target.name}{' (dry run)' if args.dry_run else ''}")
+    print("=" * 50)
+
+    stats = migrate(db, source, target,
+                    batch_size=args.batch_size,
+                    dry_run=args.dry_run,
+                    delete_source=args.delete_source)
+
+    print(f"\n✓ Copied:  {stats['copied']}")
+    print(f"  Skipped: {stats['skipped']} (missing uid)")
+    print(f"  Deleted: {stats['deleted']}")
+    if target.name != 'flat':
+        print("\nRemember to set LOGIN_HISTORY_LAYOUT=" + target.name + " before restarting the API.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Per-process background work for Prasadam Connect.
+
+Threads do not survive fork, so a background thread started in the gunicorn
+master (with --preload) or before a worker forked is missing in the child.
+`ProcessLocal` starts its thread lazily, once in each process that uses it.
+"""
+import os
+import threading
+
+
+class ProcessLocal:
+    """
+    Run a start function at most once per process, on first use.
+
+    Args:
+        start: Callable that starts the background work and returns a handle
+            (e.g. a started thread or QueueListener)
+
+    Usage:
+        writer = ProcessLocal(lambda: start_writer_thread())
+        writer.ensure()  # before each use
+    """
+
+    def __init__(self, start):
+        self._start = start
+        self._pid = None
+        self._lock = threading.Lock()
+        self.handle = None
+
+    @property
+    def running(self):
+        """Whether the work was started in this process"""
+        return self._pid == os.getpid()
+
+    def ensure(self):
+        """Start the work in this process unless it already runs here"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.handle = self._start()
+            self._pid = os.getpid()
+
+    def reset(self):
+        """Forget the work started in this process (after stopping it), so `ensure` starts it again"""
+        self._pid = None
@@ -0,0 +1,278 @@
+"""
+Per-request profiling and slow-request capture for Prasadam Connect.
+
+Every request gets a lightweight phase timer on flask.g. JSON body parsing
+and response serialization are timed automatically; handlers mark
+validation and backend calls with `phase('firestore.users.get')` blocks.
+Requests slower than the slow-request threshold are kept in a ring buffer
+with their per-phase breakdown.
+
+A configurable fraction of requests (or any request flagged by the caller,
+e.g. an admin header) additionally runs under cProfile. Only one request per
+process is profiled at a time (Python 3.12+ refuses to enable a second
+profiler); requests sampled meanwhile are counted and run unprofiled.
+Profiles are kept in memory as text summaries and, when an output directory
+is configured, written by a background thread as `.prof` files (open with
+snakeviz/tuna or convert with flameprof) next to `.folded` phase breakdowns
+that flamegraph.pl and speedscope read directly.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from flask import Request, g, request
+from flask.json.provider import DefaultJSONProvider
+
+from process_local import ProcessLocal
+
+logger = logging.getLogger(__name__)
+
+# cProfile can only be active once per process
+_profiling_lock = threading.Lock()
+
+
+@contextmanager
+def _timed(timer, name):
+    timer.enter()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.exit(name, time.perf_counter() - started)
+
+
+@contextmanager
+def _untimed():
+    yield
+
+
+def phase(name):
+    """
+    Time a block of the current request under `name`.
+
+    Usage:
+        with phase('firestore.users.get'):
+            user_doc = user_ref.get()
+    """
+    timer = g.get('request_timer') if g else None
+    if timer is None:
+        return _untimed()
+    return _timed(timer, name)
+
+
+class RequestTimer:
+    """
+    Accumulates per-phase durations for one request.
+
+    Phase times are exclusive: time spent in a nested phase (e.g. serializing
+    an error response inside 'validate') is only counted for the inner phase.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self._nested = []
+
+    def enter(self):
+        self._nested.append(0.0)
+
+    def exit(self, name, seconds):
+        nested = self._nested.pop()
+        if self._nested:
+            self._nested[-1] += seconds
+        total, calls = self.phases.get(name, (0.0, 0))
+        self.phases[name] = (total + seconds - nested, calls + 1)
+
+    def breakdown(self, total_seconds):
+        """Return phases in ms, plus the time not covered by any phase as 'other'"""
+        phases = [
+            {'name': name, 'ms': round(seconds * 1000, 3), 'calls': calls}
+            for name, (seconds, calls) in self.phases.items()
+        ]
+        covered = sum(seconds for seconds, _ in self.phases.values())
+        phases.append({'name': 'other', 'ms': round(max(total_seconds - covered, 0.0) * 1000, 3), 'calls': 1})
+        return phases
+
+
+class TimedRequest(Request):
+    """Request class that records JSON body parsing as the 'parse' phase"""
+
+    def get_json(self, *args, **kwargs):
+        with phase('parse'):
+            return super().get_json(*args, **kwargs)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records response serialization as the 'serialize' phase"""
+
+    def response(self, *args, **kwargs):
+        with phase('serialize'):
+            return super().response(*args, **kwargs)
+
+
+class RequestProfiler:
+    """
+    Flask extension wiring the phase timer, sampling profiler and slow-request
+    capture into an app.
+
+    Args:
+        sample_rate: Fraction of requests (0.0-1.0) to run under cProfile
+        slow_ms: Requests at least this slow are captured (0 disables capture)
+        buffer_size: Number of slow requests and profiles kept in memory
+        output_dir: Directory to write .prof/.folded files to, or None
+        force_profile: Callable returning True when the current request
+            must be profiled regardless of sampling
+        write_queue_size: Captures waiting to be written before new ones
+            are dropped (and counted)
+    """
+
+    def __init__(self, sample_rate=0.0, slow_ms=1000, buffer_size=50, output_dir=None, force_profile=None,
+                 write_queue_size=100):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.output_dir = output_dir
+        self.force_profile = force_profile
+        self.slow_requests = deque(maxlen=buffer_size)
+        self.profiles = deque(maxlen=buffer_size)
+        self.skipped_profiles = 0
+        self.dropped_writes = 0
+        self._lock = threading.Lock()
+        self._writes = queue.Queue(maxsize=write_queue_size)
+        self._writer = ProcessLocal(self._start_writer)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    def init_app(self, app):
+        app.request_class = TimedRequest
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        g.request_timer = RequestTimer()
+        if (self.sample_rate and random.random() < self.sample_rate) or \
+                (self.force_profile is not None and self.force_profile()):
+            if not _profiling_lock.acquire(blocking=False):
+                with self._lock:
+                    self.skipped_profiles += 1
+                return
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) is active in this process
+                _profiling_lock.release()
+                with self._lock:
+                    self.skipped_profiles += 1
+                return
+            g.request_profiler = profiler
+
+    @staticmethod
+    def _stop_profiler():
+        profiler = g.pop('request_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _profiling_lock.release()
+        return profiler
+
+    def _teardown_request(self, exc):
+        # after_request does not run when a handler raises
+        self._stop_profiler()
+
+    def _after_request(self, response):
+        timer = g.pop('request_timer', None)
+        profiler = self._stop_profiler()
+        if timer is None:
+            return response
+
+        total = time.perf_counter() - timer.started
+        is_slow = self.slow_ms and total * 1000 >= self.slow_ms
+        if profiler is None and not is_slow:
+            return response
+
+        record = {
+            'id': uuid.uuid4().hex[:12],
+            'requestId': g.get('request_id'),
+            'startedAt': time.time() - total,
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'durationMs': round(total * 1000, 3),
+            'phases': timer.breakdown(total),
+            'profiled': profiler is not None,
+        }
+
+        with self._lock:
+            if is_slow:
+                self.slow_requests.append(record)
+            if profiler is not None:
+                self.profiles.append(dict(record, stats=self._summarize(profiler)))
+
+        if self.output_dir:
+            self._queue_write(record, profiler)
+        return response
+
+    @staticmethod
+    def _summarize(profiler, limit=30):
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def _queue_write(self, record, profiler):
+        self._writer.ensure()
+        try:
+            self._writes.put_nowait((record, profiler))
+        except queue.Full:
+            with self._lock:
+                self.dropped_writes += 1
+
+    def _start_writer(self):
+        if self._writer.handle is not None:
+            # Restarted, e.g. after fork: the old queue may list the parent's writer as a waiter
+            # (its wake-ups would go nowhere) and still holds the parent's captures
+            self._writes = queue.Queue(self._writes.maxsize)
+        writer = threading.Thread(target=self._write_loop, name='profile-writer', daemon=True)
+        writer.start()
+        return writer
+
+    def _write_loop(self):
+        while True:
+            record, profiler = self._writes.get()
+            try:
+                self._write_files(record, profiler)
+            except OSError:
+                logger.exception("Failed to write profile files for %s", record['path'])
+
+    def _write_files(self, record, profiler):
+        base = os.path.join(self.output_dir, f"{int(record['startedAt'])}-{record['id']}-{record['endpoint'] or 'unknown'}")
+        # Folded stacks: one "frame;frame value" line per phase, values in microseconds
+        root = f"{record['method']} {record['path']}".replace(';', '_').replace(' ', '_')
+        with open(f'{base}.folded', 'w', encoding='utf-8') as f:
+            for item in record['phases']:
+                f.write(f"{root};{item['name']} {int(item['ms'] * 1000)}\n")
+        if profiler is not None:
+            profiler.dump_stats(f'{base}.prof')
+
+    def snapshot(self):
+        """Return copies of the captured slow requests and profiles, newest first"""
+        with self._lock:
+            return list(reversed(self.slow_requests)), list(reversed(self.profiles))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'skippedProfiles': self.skipped_profiles,
+                'pendingWrites': self._writes.qsize(),
+                'droppedWrites': self.dropped_writes,
+            }
@@ -0,0 +1,190 @@
+"""
+Request body schemas for Prasadam Connect.
+
+Each endpoint declares its JSON body once as a `Schema` of named fields.
+`Schema.validate` walks the fields in a single pass, normalizing values
+(strip, lowercase, integer coercion) and checking them against precompiled
+patterns, and returns every field error at once instead of stopping at the
+first one.
+
+Usage:
+    body, errors = REGISTER_USER.validate(request.get_json(silent=True))
+    if errors:
+        return validation_error(errors)
+"""
+import re
+
+# Patterns are compiled once and matched with fullmatch, so they carry no anchors
+EMAIL_PATTERN = re.compile(r'[^\s@]+@[^\s@]+\.[^\s@]+')
+PHONE_PATTERN = re.compile(r'\+\d{10,15}')
+
+INVALID_EMAIL = 'Invalid email format'
+INVALID_PHONE = 'Invalid phone number format'
+INVALID_PHONE_E164 = 'Invalid phone number format. Must be in E.164 format (e.g., +1234567890)'
+
+# Key used in the error map when the body itself is not a JSON object
+BODY_ERROR_KEY = '_body'
+
+
+class String:
+    """
+    A string field.
+
+    Args:
+        required: Reject missing or blank values. Optional fields that are
+            missing or blank are left out of the validated body.
+        lower: Lowercase the value after stripping whitespace
+        pattern: Compiled pattern the whole value must match
+        max_length: Maximum length after stripping
+        missing: Error message for a missing required value
+            (defaults to 'Missing required field: <name>')
+        invalid: Error message for a value that does not match `pattern`
+    """
+
+    def __init__(self, required=False, lower=False, pattern=None, max_length=None, missing=None, invalid=None):
+        self.required = required
+        self.lower = lower
+        self.pattern = pattern
+        self.match = pattern.fullmatch if pattern is not None else None
+        self.max_length = max_length
+        self.missing = missing
+        self.invalid = invalid
+        self.name = None
+
+    def bind(self, name):
+        self.name = name
+        if self.missing is None:
+            self.missing = f'Missing required field: {name}'
+        if self.invalid is None:
+            self.invalid = f'Invalid {name}'
+        return self
+
+    def clean(self, value):
+        """
+        Normalize and check a value.
+
+        Returns:
+            tuple: (value, error) - value is None when the field should be
+                left out of the validated body; error is None when valid
+        """
+        if value is None:
+            return None, (self.missing if self.required else None)
+        if not isinstance(value, str):
+            return None, f'{self.name} must be a string'
+        value = value.strip()
+        if not value:
+            return None, (self.missing if self.required else None)
+        if self.lower:
+            value = value.lower()
+        if self.max_length is not None and len(value) > self.max_length:
+            return None, f'{self.name} must be at most {self.max_length} characters'
+        if self.match is not None and self.match(value) is None:
+            return None, self.invalid
+        return value, None
+
+
+class Integer:
+    """
+    A lenient integer field: missing or unparseable values fall back to
+    `default`, and parsed values are clamped to [minimum, maximum].
+    """
+
+    def __init__(self, default, minimum=None, maximum=None):
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.name = None
+
+    def bind(self, name):
+        self.name = name
+        return self
+
+    def clean(self, value):
+        if value is None or isinstance(value, bool):
+            return self.default, None
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return self.default, None
+        if self.minimum is not None:
+            value = max(self.minimum, value)
+        if self.maximum is not None:
+            value = min(value, self.maximum)
+        return value, None
+
+
+class Schema:
+    """
+    An ordered set of named fields describing a JSON request body.
+
+    Fields are declared as keyword arguments in the order errors should be
+    reported, e.g. `Schema(uid=String(required=True), ...)`. Keys in the body
+    that are not declared are ignored.
+    """
+
+    def __init__(self, **fields):
+        self.fields = tuple(field.bind(name) for name, field in fields.items())
+
+    def validate(self, data):
+        """
+        Validate and normalize a request body.
+
+        Args:
+            data: Parsed JSON body (anything; non-objects are rejected)
+
+        Returns:
+            tuple: (body, errors) - the normalized fields and a dict mapping
+                field names to error messages (empty when the body is valid)
+        """
+        if not isinstance(data, dict):
+            return {}, {BODY_ERROR_KEY: 'Request body must be a JSON object'}
+
+        body = {}
+        errors = {}
+        for field in self.fields:
+            value, error = field.clean(data.get(field.name))
+            if error is not None:
+                errors[field.name] = error
+            elif value is not None:
+                body[field.name] = value
+        return body, errors
+
+
+def error_message(errors):
+    """Summarize an error map as a single message (the first error when there is only one)"""
+    return '; '.join(errors.values())
+
+
+NEW_USER = Schema(
+    uid=String(required=True),
+    name=String(required=True),
+    email=String(required=True, lower=True, pattern=EMAIL_PATTERN, invalid=INVALID_EMAIL),
+    phoneNumber=String(required=True, pattern=PHONE_PATTERN, invalid=INVALID_PHONE_E164),
+    address=String(required=True),
+)
+
+CHECK_USER = Schema(
+    phoneNumber=String(required=True, pattern=PHONE_PATTERN, missing='Phone number is required', invalid=INVALID_PHONE),
+)
+
+RECORD_LOGIN = Schema(
+    uid=String(required=True, missing='UID is required'),
+    phoneNumber=String(required=True, pattern=PHONE_PATTERN, missing='Phone number is required', invalid=INVALID_PHONE),
+)
+
+BOOTSTRAP_SESSION = Schema(
+    uid=String(required=True, missing='UID is required'),
+    phoneNumber=String(required=True, pattern=PHONE_PATTERN, missing='Phone number is required', invalid=INVALID_PHONE),
+    historyLimit=Integer(default=10, minimum=1, maximum=100),
+)
+
+# Phone number cannot be updated for security reasons
+UPDATE_USER = Schema(
+    name=String(),
+    email=String(lower=True, pattern=EMAIL_PATTERN, invalid=INVALID_EMAIL),
+    address=String(),
+)
+
+UNREGISTER_USER = Schema(
+    uid=String(required=True, missing='UID is required'),
+)
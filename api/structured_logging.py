@@ -0,0 +1,195 @@
+"""
+Non-blocking structured logging for Prasadam Connect.
+
+Log records are put on a bounded in-memory queue by the request thread and
+written as one JSON object per line by a background thread, so a failure
+storm does not add stderr I/O to every failed request:
+
+- Records carry the request id (X-Request-ID header or a generated one),
+  method and path of the request that logged them; the id is echoed back in
+  the X-Request-ID response header.
+- Repeated identical records (same logger, level, message and exception
+  type) are sampled: the first `burst` per window are logged, the rest are
+  counted and reported on the next record that gets through.
+- When the queue is full, records are dropped and counted instead of
+  blocking the request.
+
+Configured with LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_BURST and
+LOG_SAMPLE_WINDOW_SECONDS.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+from flask import g, has_request_context, request
+
+from process_local import ProcessLocal
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Accept caller-supplied request ids only if they are short and printable
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in ('request_id', 'method', 'path', 'suppressed'):
+            value = getattr(record, field, None)
+            if value:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_type'] = record.exc_info[0].__name__
+            entry['exc'] = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, default=str)
+
+
+class RepeatSampler(logging.Filter):
+    """
+    Let through at most `burst` identical records per `window` seconds.
+
+    The number of records suppressed since the last one that got through is
+    attached to the next emitted record as `suppressed`.
+    """
+
+    def __init__(self, burst=5, window=60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+
+        exc_type = record.exc_info[0].__name__ if record.exc_info else None
+        key = (record.name, record.levelno, record.msg, exc_type)
+        now = time.monotonic()
+
+        with self._lock:
+            started, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            count += 1
+            if count > self.burst:
+                self._windows[key] = (started, count, suppressed + 1)
+                self.suppressed_total += 1
+                return False
+            self._windows[key] = (started, count, 0)
+            # Bound the table size: forget windows that have expired
+            if len(self._windows) > 1000:
+                self._windows = {
+                    k: v for k, v in self._windows.items() if now - v[0] < self.window
+                }
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks: records are dropped (and counted) when
+    the queue is full. The background listener is (re)started lazily, so the
+    handler keeps working in processes forked after it was created.
+    """
+
+    def __init__(self, log_queue, target_handler):
+        super().__init__(log_queue)
+        self.target_handler = target_handler
+        self.dropped = 0
+        self.enqueued = 0
+        self._listener = ProcessLocal(self._start_listener)
+
+    def _start_listener(self):
+        if self._listener.handle is not None:
+            # Restarted, e.g. after fork: the old queue may list the parent's listener as a waiter
+            # (its wake-ups would go nowhere) and still holds the parent's records
+            self.queue = queue.Queue(self.queue.maxsize)
+        listener = logging.handlers.QueueListener(self.queue, self.target_handler)
+        listener.start()
+        return listener
+
+    def prepare(self, record):
+        # Merge the arguments and capture request context on the calling
+        # thread; traceback formatting and JSON encoding happen on the
+        # listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+        return record
+
+    def enqueue(self, record):
+        self._listener.ensure()
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Flush queued records and stop the listener"""
+        if self._listener.running:
+            self._listener.handle.stop()
+            self._listener.reset()
+
+
+def configure_logging(level='INFO', queue_size=10000, burst=5, window=60.0, stream=None):
+    """
+    Route the root logger through a bounded queue to a background JSON writer.
+
+    Returns:
+        tuple: (BoundedQueueHandler, RepeatSampler) for metrics
+    """
+    target = logging.StreamHandler(stream or sys.stderr)
+    target.setFormatter(JSONFormatter())
+
+    handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), target)
+    sampler = RepeatSampler(burst=burst, window=window)
+    handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, BoundedQueueHandler):
+            existing.stop()
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    atexit.register(handler.stop)
+    return handler, sampler
+
+
+def init_request_ids(app):
+    """Assign every request an id and echo it in the X-Request-ID response header"""
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def echo_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
@@ -0,0 +1,125 @@
+"""
+User agent parsing for Prasadam Connect login records.
+
+Raw User-Agent headers are long and highly repetitive, so login records store
+normalized browser/OS/device families instead of (or next to) the raw
+string. Parsing uses a small set of precompiled patterns and is cached with
+an LRU cache keyed by the raw header, so repeated agents cost a dict lookup.
+
+The cache size is set with USER_AGENT_CACHE_SIZE (default 2048).
+"""
+import os
+import re
+from functools import lru_cache
+
+# Longer headers are truncated before parsing so hostile input cannot blow up
+# the cache memory
+MAX_USER_AGENT_LENGTH = 512
+
+CACHE_SIZE = int(os.getenv('USER_AGENT_CACHE_SIZE', 2048))
+
+BOT_PATTERN = re.compile(
+    r'bot\b|crawler|spider|slurp|facebookexternalhit|headless|curl/|wget/|python-requests|okhttp|httpclient',
+    re.IGNORECASE,
+)
+
+# (family, pattern) - first match wins, so more specific browsers come first
+BROWSER_PATTERNS = [
+    ('Edge', re.compile(r'(?:Edg|Edge|EdgA|EdgiOS)/(\d+)')),
+    ('Samsung Internet', re.compile(r'SamsungBrowser/(\d+)')),
+    ('Opera', re.compile(r'(?:OPR|Opera)/(\d+)')),
+    ('UC Browser', re.compile(r'UCBrowser/(\d+)')),
+    ('Firefox', re.compile(r'(?:Firefox|FxiOS)/(\d+)')),
+    ('Chrome WebView', re.compile(r'; wv\).*?Chrome/(\d+)')),
+    ('Chrome', re.compile(r'(?:Chrome|CriOS)/(\d+)')),
+    ('Safari', re.compile(r'Version/(\d+).*Safari/')),
+    ('Internet Explorer', re.compile(r'(?:MSIE |Trident/.*rv:)(\d+)')),
+]
+
+OS_PATTERNS = [
+    ('iOS', re.compile(r'(?:iPhone|CPU) OS (\d+)')),
+    ('Android', re.compile(r'Android (\d+)')),
+    ('Windows', re.compile(r'Windows NT (\d+\.\d+)')),
+    ('Chrome OS', re.compile(r'CrOS()')),
+    ('macOS', re.compile(r'Mac OS X (\d+[._]\d+)')),
+    ('Linux', re.compile(r'Linux()')),
+]
+
+WINDOWS_VERSIONS = {'10.0': '10', '6.3': '8.1', '6.2': '8', '6.1': '7', '6.0': 'Vista', '5.1': 'XP'}
+
+TABLET_PATTERN = re.compile(r'iPad|Tablet')
+MOBILE_PATTERN = re.compile(r'Mobi|iPhone|iPod')
+
+
+def _match(patterns, user_agent):
+    for family, pattern in patterns:
+        match = pattern.search(user_agent)
+        if match:
+            return family, match.group(1) or None
+    return 'Other', None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(user_agent):
+    if BOT_PATTERN.search(user_agent):
+        browser, browser_version = _match(BROWSER_PATTERNS, user_agent)
+        return ('Bot' if browser == 'Other' else browser, browser_version, 'Other', None, 'bot')
+
+    browser, browser_version = _match(BROWSER_PATTERNS, user_agent)
+    os_family, os_version = _match(OS_PATTERNS, user_agent)
+
+    if os_family == 'Windows':
+        os_version = WINDOWS_VERSIONS.get(os_version, os_version)
+    elif os_family == 'macOS' and os_version:
+        os_version = os_version.replace('_', '.')
+
+    if TABLET_PATTERN.search(user_agent) or (os_family == 'Android' and 'Mobile' not in user_agent):
+        device = 'tablet'
+    elif MOBILE_PATTERN.search(user_agent):
+        device = 'mobile'
+    elif os_family in ('Windows', 'macOS', 'Linux', 'Chrome OS'):
+        device = 'desktop'
+    else:
+        device = 'other'
+
+    return (browser, browser_version, os_family, os_version, device)
+
+
+def parse_user_agent(user_agent):
+    """
+    Parse a User-Agent header into normalized families.
+
+    Args:
+        user_agent: Raw User-Agent header value
+
+    Returns:
+        dict: browserFamily, browserVersion, osFamily, osVersion and
+            deviceFamily ('mobile', 'tablet', 'desktop', 'bot' or 'other');
+            versions are major versions or None
+    """
+    browser, browser_version, os_family, os_version, device = _parse((user_agent or '')[:MAX_USER_AGENT_LENGTH])
+    return {
+        'browserFamily': browser,
+        'browserVersion': browser_version,
+        'osFamily': os_family,
+        'osVersion': os_version,
+        'deviceFamily': device,
+    }
+
+
+def cache_stats():
+    """Return hit/miss counters of the parse cache"""
+    info = _parse.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hitRate': info.hits / lookups if lookups else 0.0,
+        'size': info.currsize,
+        'maxSize': info.maxsize,
+    }
+
+
+def clear_cache():
+    """Empty the parse cache and reset its counters"""
+    _parse.cache_clear()
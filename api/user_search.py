@@ -0,0 +1,327 @@
+"""
+In-process user search index for Prasadam Connect.
+
+Finds users by partial name, email or address without Firestore queries:
+
+- Every user's name, email and address are tokenized (lowercase, accents
+  stripped, split on anything that is not a letter or digit, so an email
+  address matches by its parts).
+- An inverted index maps each token to the users containing it, and a
+  sorted token list answers prefix lookups with bisect, so "radh kris"
+  matches "Radha Krishna".
+- Results must match every query token. They are ranked by field weight
+  (name > email > address), exact token matches above prefix matches, then
+  by uid so pages are stable.
+
+The index is built from a paged scan of `users` in a background thread when
+a worker first searches, and kept current by `upsert`/`remove` calls from the
+handlers that write users (ignored until a build has started, so workers
+that never search hold nothing). Each worker process has its own index, so
+it is rebuilt periodically to pick up writes handled by other workers.
+"""
+import bisect
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('name', 'email', 'address')
+RESULT_FIELDS = ('name', 'email', 'address', 'phoneNumber')
+FIELD_WEIGHTS = {'name': 3.0, 'email': 2.0, 'address': 1.0}
+EXACT_BONUS = 2.0
+# Seconds to wait before retrying a failed build
+RETRY_SECONDS = 30
+# Walking a posting is much cheaper per entry than checking a candidate's
+# tokens, so postings up to this many times the candidates are intersected
+POSTINGS_SCAN_FACTOR = 20
+# Query tokens shorter than this only match whole tokens, not prefixes
+MIN_PREFIX_LENGTH = 2
+NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def tokenize(value):
+    """Split text into lowercase ASCII word tokens (also used by find_duplicate_users.py)"""
+    if not isinstance(value, str):
+        return []
+    if not value.isascii():
+        value = unicodedata.normalize('NFKD', value)
+        value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return [token for token in NON_WORD.split(value.lower()) if token]
+
+
+class UserSearchIndex:
+    """
+    Inverted/prefix index over user profiles.
+
+    Args:
+        page_size: Documents per page when scanning `users`
+        refresh_seconds: Rebuild the index when it is older than this
+            (0 disables periodic rebuilds)
+    """
+
+    def __init__(self, page_size=500, refresh_seconds=900):
+        self.page_size = page_size
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._reset()
+        self.built_at = None
+        self.build_seconds = None
+        self._building = False
+        self._build_pid = None
+        self._attempted_at = float('-inf')
+        self._touched = None
+
+    def _reset(self):
+        self._postings = {}     # token -> {uid: weight}
+        self._vocabulary = []   # sorted tokens
+        self._documents = {}    # uid -> result fields
+        self._doc_tokens = {}   # uid -> {token: weight}
+
+    @property
+    def ready(self):
+        return self.built_at is not None
+
+    # Updates
+
+    def _add(self, uid, profile, sort=True):
+        self._delete(uid)
+        weights = {}
+        for field in SEARCH_FIELDS:
+            for token in tokenize(profile.get(field)):
+                weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+        self._documents[uid] = {field: profile.get(field) for field in RESULT_FIELDS}
+        self._doc_tokens[uid] = weights
+        for token, weight in weights.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                if sort:
+                    bisect.insort(self._vocabulary, token)
+            posting[uid] = weight
+
+    def _delete(self, uid):
+        weights = self._doc_tokens.pop(uid, None)
+        self._documents.pop(uid, None)
+        if not weights:
+            return
+        for token in weights:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(uid, None)
+            if not posting:
+                del self._postings[token]
+                position = bisect.bisect_left(self._vocabulary, token)
+                if position < len(self._vocabulary) and self._vocabulary[position] == token:
+                    del self._vocabulary[position]
+
+    def _active(self):
+        return self._build_pid == os.getpid()
+
+    def upsert(self, uid, profile):
+        """Add or replace a user (call after the user is written)"""
+        if not self._active():
+            return
+        with self._lock:
+            if self._touched is not None:
+                self._touched.add(uid)
+            self._add(uid, profile)
+
+    def remove(self, uid):
+        """Remove a user (call after the user is deleted)"""
+        if not self._active():
+            return
+        with self._lock:
+            if self._touched is not None:
+                self._touched.add(uid)
+            self._delete(uid)
+
+    # Building
+
+    def build(self, db):
+        """
+        Build the index from a paged scan of `users`.
+
+        The new index is assembled without holding the lock; users written
+        through `upsert`/`remove` meanwhile keep their newer state instead of
+        the scanned one.
+
+        Returns:
+            int: Number of indexed users
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._touched = set()
+        try:
+            fresh = UserSearchIndex()
+            query = db.collection('users').order_by('__name__').select(list(RESULT_FIELDS)).limit(self.page_size)
+            last = None
+            while True:
+                page = (query.start_after(last) if last is not None else query).get()
+                for doc in page:
+                    fresh._add(doc.id, doc.to_dict() or {}, sort=False)
+                if len(page) < self.page_size:
+                    break
+                last = page[-1]
+
+            fresh._vocabulary = sorted(fresh._postings)
+
+            with self._lock:
+                for uid in self._touched:
+                    if uid in self._documents:
+                        fresh._add(uid, self._documents[uid])
+                    else:
+                        fresh._delete(uid)
+                self._postings = fresh._postings
+                self._vocabulary = fresh._vocabulary
+                self._documents = fresh._documents
+                self._doc_tokens = fresh._doc_tokens
+                self.built_at = time.time()
+                self.build_seconds = time.perf_counter() - started
+                count = len(self._documents)
+            logger.info("Built user search index: %d users in %.2fs", count, self.build_seconds)
+            return count
+        finally:
+            with self._lock:
+                self._touched = None
+
+    def _stale(self, pid):
+        if self._build_pid != pid:
+            return True
+        if self.built_at is None:
+            return not self._building and time.monotonic() - self._attempted_at >= RETRY_SECONDS
+        return bool(self.refresh_seconds) and time.time() - self.built_at >= self.refresh_seconds
+
+    def start_build(self, db):
+        """Build (or rebuild when stale) in a background thread; once per process at a time"""
+        pid = os.getpid()
+        if not self._stale(pid):
+            return
+        with self._lock:
+            if (self._building and self._build_pid == pid) or not self._stale(pid):
+                return
+            self._building = True
+            self._build_pid = pid
+            self._attempted_at = time.monotonic()
+
+        def run():
+            try:
+                self.build(db)
+            except Exception:
+                logger.exception("User search index build failed")
+            finally:
+                with self._lock:
+                    self._building = False
+
+        threading.Thread(target=run, name='user-search-index', daemon=True).start()
+
+    # Queries
+
+    def _prefixed(self, token):
+        """Indexed tokens that extend `token` (empty for short tokens)"""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return []
+        start = bisect.bisect_right(self._vocabulary, token)
+        end = bisect.bisect_left(self._vocabulary, token + '\uffff', start)
+        return self._vocabulary[start:end]
+
+    @staticmethod
+    def _matches(exact, extensions):
+        """{uid: score} for one query token from copies of its exact and prefix postings"""
+        scores = {uid: weight * EXACT_BONUS for uid, weight in exact.items()}
+        for posting in extensions:
+            for uid, weight in posting.items():
+                if weight > scores.get(uid, 0.0):
+                    scores[uid] = weight
+        return scores
+
+    @staticmethod
+    def _score(weights, token):
+        """Score of one query token against one user's token weights (0 if it does not match)"""
+        if not weights:
+            return 0.0
+        if token in weights:
+            return weights[token] * EXACT_BONUS
+        if len(token) < MIN_PREFIX_LENGTH:
+            return 0.0
+        return max((weight for other, weight in weights.items() if other.startswith(token)), default=0.0)
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Search users; every query token must match a token of the user.
+
+        Only copying postings and looking up candidates hold the lock;
+        intersecting and ranking run outside it, so a broad query does not
+        hold up `upsert`/`remove`. A user removed meanwhile may still be
+        counted in the total but is left out of the page.
+
+        Returns:
+            tuple: (list of result dicts with uid and score, total matches)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+
+        # Start from the most selective token; each further token is
+        # intersected through its postings, unless they are much larger than
+        # the remaining candidates, which are then checked one by one. Only
+        # postings small enough to be intersected are copied.
+        with self._lock:
+            expansions = {token: self._prefixed(token) for token in tokens}
+            sizes = {
+                token: len(self._postings.get(token, ())) + sum(len(self._postings[other]) for other in expansions[token])
+                for token in tokens
+            }
+            tokens.sort(key=sizes.get)
+            bound = sizes[tokens[0]] * POSTINGS_SCAN_FACTOR
+            postings = {
+                token: (dict(self._postings.get(token, ())), [dict(self._postings[other]) for other in expansions[token]])
+                for token in tokens if sizes[token] < bound
+            }
+
+        if tokens[0] not in postings:
+            return [], 0
+        scores = self._matches(*postings[tokens[0]])
+        candidate_tokens = None
+        for token in tokens[1:]:
+            if not scores:
+                break
+            if sizes[token] < len(scores) * POSTINGS_SCAN_FACTOR:
+                matches = self._matches(*postings[token])
+                scores = {uid: scores[uid] + score for uid, score in matches.items() if uid in scores}
+                continue
+            if candidate_tokens is None:
+                # Token weights are replaced, never changed in place, so the
+                # references stay consistent after the lock is released
+                with self._lock:
+                    candidate_tokens = {uid: self._doc_tokens.get(uid) for uid in scores}
+            scores = {
+                uid: score + extra
+                for uid, score in scores.items()
+                for extra in (self._score(candidate_tokens[uid], token),) if extra
+            }
+
+        top = heapq.nsmallest(offset + limit, [(-score, uid) for uid, score in scores.items()])
+        with self._lock:
+            documents = [(uid, self._documents.get(uid), score) for score, uid in top[offset:]]
+        page = [
+            dict(document, uid=uid, score=round(-score, 2))
+            for uid, document, score in documents if document is not None
+        ]
+        return page, len(scores)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'building': self._building,
+                'users': len(self._documents),
+                'tokens': len(self._vocabulary),
+                'builtAt': self.built_at,
+                'buildSeconds': round(self.build_seconds, 3) if self.build_seconds is not None else None,
+            }
@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react';
 import Login from './Login.jsx';
 import { auth } from './firebase.js';
 import { onAuthStateChanged, signOut } from 'firebase/auth';
-import { getUserProfile, updateUserProfile } from './api.js';
+import { cancelSessionHandoff, getUserProfile, takeSessionHandoff, updateUserProfile } from './api.js';
 
 export default function App() {
 	const [user, setUser] = useState(null);
@@ -19,6 +19,10 @@ export default function App() {
 
 	useEffect(() => {
 		const unsub = onAuthStateChanged(auth, (u) => {
+			if (!u) {
+				// A handoff left over from an abandoned sign-in must not reach the next user
+				cancelSessionHandoff();
+			}
 			setUser(u);
 			setLoading(false);
 		});
@@ -30,7 +34,9 @@ export default function App() {
 		if (user?.uid) {
 			setProfileLoading(true);
 			setProfileError(null);
-			getUserProfile(user.uid)
+			// Reuse the bootstrap response from the login flow when there is one
+			const profileRequest = takeSessionHandoff(user.uid) || getUserProfile(user.uid);
+			profileRequest
 				.then((response) => {
 					if (response.success && response.user) {
 						setUserProfile(response.user);
@@ -1,7 +1,7 @@
 import React, { useEffect, useLayoutEffect, useRef, useState } from 'react';
 import { auth, getOrCreateRecaptcha, clearRecaptcha } from './firebase.js';
 import { signInWithPhoneNumber, signOut } from 'firebase/auth';
-import { checkUserExists, registerUser, recordLogin, createUserWithLogin, unregisterUser } from './api.js';
+import { checkUserExists, registerUser, beginSessionHandoff, bootstrapSession, cancelSessionHandoff, createUserWithLogin, unregisterUser } from './api.js';
 
 // Common countries with their phone codes
 const COUNTRIES = [
@@ -281,11 +281,16 @@ export default function Login() {
 				setOtp(''); // Clear input
 				return;
 			}
+			if (mode !== 'register') {
+				// App may see the signed-in user before bootstrapSession starts
+				beginSessionHandoff();
+			}
 			await confirmationRef.current.confirm(otp);
 			
 			// Get the authenticated user
 			const user = auth.currentUser;
 			if (!user) {
+				cancelSessionHandoff();
 				showToast('Authentication failed', 'error');
 				return;
 			}
@@ -330,10 +335,13 @@ export default function Login() {
 				// Registration form is already filled, now complete registration
 				await handleRegisterComplete(user.uid, fullPhone);
 			} else {
-				// Login: check if user exists via API
+				// Login: record the login and load the session in one request
+				// (the API answers 404 when the user does not exist)
 				try {
-					const checkResult = await checkUserExists(fullPhone);
-					if (!checkResult.exists) {
+					await bootstrapSession(user.uid, fullPhone);
+					showToast('Authentication successful!', 'success');
+				} catch (apiError) {
+					if (apiError.status === 404) {
 						// User doesn't exist - they're already authenticated, just need to complete registration
 						showToast('User not found. Please complete your registration.', 'error');
 						setMode('register');
@@ -343,10 +351,6 @@ export default function Login() {
 						// User is already authenticated, so show registration form directly
 						return;
 					}
-					// User exists - record login history
-					await recordLogin(user.uid, fullPhone);
-					showToast('Authentication successful!', 'success');
-				} catch (apiError) {
 					// Fail fast: Don't allow login if user existence cannot be verified
 					console.error('Could not verify user existence:', apiError);
 					showToast('Unable to verify account. Please try again later.', 'error');
@@ -362,6 +366,7 @@ export default function Login() {
 				}
 			}
 		} catch (err) {
+			cancelSessionHandoff();
 			showToast(err?.message || 'Invalid OTP', 'error');
 			setOtp(''); // Clear input on error
 		}
@@ -93,6 +93,90 @@ export async function recordLogin(uid, phoneNumber) {
 	});
 }
 
+// Session handoff from the login flow to App. The login flow opens it before signing in,
+// because onAuthStateChanged may fire before the bootstrap request has started; App waits
+// on it instead of racing it. It settles with the bootstrap request, or with null when the
+// login flow cancels it. It is dropped once both taken and settled, on sign-out, or after
+// SESSION_HANDOFF_TIMEOUT_MS, so it never outlives the sign-in that opened it.
+const SESSION_HANDOFF_TIMEOUT_MS = 15000;
+let sessionHandoff = null;
+
+/**
+ * Open a session handoff before signing in (replaces any previous one)
+ */
+export function beginSessionHandoff() {
+	cancelSessionHandoff();
+	let resolvePromise;
+	const handoff = {
+		promise: new Promise((resolve) => {
+			resolvePromise = resolve;
+		}),
+		settled: false,
+		taken: false,
+	};
+	handoff.settle = (session) => {
+		if (handoff.settled) {
+			return;
+		}
+		handoff.settled = true;
+		resolvePromise(session);
+		if (handoff.taken && sessionHandoff === handoff) {
+			sessionHandoff = null;
+		}
+	};
+	setTimeout(() => {
+		handoff.settle(null);
+		if (sessionHandoff === handoff) {
+			sessionHandoff = null;
+		}
+	}, SESSION_HANDOFF_TIMEOUT_MS);
+	sessionHandoff = handoff;
+}
+
+/**
+ * Cancel the open session handoff, if any; App then fetches the profile itself
+ */
+export function cancelSessionHandoff() {
+	if (sessionHandoff) {
+		sessionHandoff.settle(null);
+		sessionHandoff = null;
+	}
+}
+
+/**
+ * Take the session handoff for a user.
+ * Returns null when there is none, otherwise a promise of the bootstrap response
+ * (or of the plain profile when the handoff was cancelled, timed out or belongs
+ * to another user).
+ */
+export function takeSessionHandoff(uid) {
+	const handoff = sessionHandoff;
+	if (!handoff || handoff.taken) {
+		return null;
+	}
+	handoff.taken = true;
+	if (handoff.settled) {
+		sessionHandoff = null;
+	}
+	return handoff.promise.then((session) => (
+		session && session.uid === uid ? session.promise : getUserProfile(uid)
+	));
+}
+
+/**
+ * Record a login and fetch the user profile and recent login history in one request
+ */
+export async function bootstrapSession(uid, phoneNumber, historyLimit = 10) {
+	const promise = apiRequest('/api/session/bootstrap', {
+		method: 'POST',
+		body: { uid, phoneNumber, historyLimit },
+	});
+	if (sessionHandoff) {
+		sessionHandoff.settle({ uid, promise });
+	}
+	return promise;
+}
+
 /**
  * Get login history for a user
  */